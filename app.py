@@ -1,73 +1,429 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, request, jsonify, g, abort
+from werkzeug.exceptions import RequestEntityTooLarge
 from flask_cors import CORS
+import hashlib
+import io
+import logging
 import os
+import time
+import uuid
 from services.barcode_service import BarcodeService
 from services.huggingface_service import HuggingFaceService
-from utils.image_processor import ImageProcessor
+from services.nutrition_service import NutritionService
+from services.fallback_service import FallbackService
+from services.history_service import HistoryService
+from services.llm_provider import create_groq_provider, models_from_env
+from utils.image_processor import ImageProcessor, ImageTooLargeError, UnsupportedImageError
+from utils.admission import admission_controlled, busy_response, pool_from_env
+from utils.memory_profiler import MemoryProfiler, stage
+from utils.json_provider import FastJSONProvider
+from utils.cache import TTLCache
+from utils.logger import setup_logging, set_request_id, get_request_id
+from utils.traffic_capture import TrafficRecorder
+from utils.query_normalizer import normalize_food_query
+from utils.deadline import DeadlineExceeded, deadline_for_request
+from utils.user_token import verify_user_id
+from datetime import date
+from functools import wraps
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Logging asinkron: thread request hanya memasukkan record ke antrian
+setup_logging()
+logger = logging.getLogger(__name__)
+
+class InMemoryUploadRequest(Request):
+    """
+    Request dengan file multipart disimpan di memori (bukan temporary file);
+    ukurannya sudah dibatasi MAX_CONTENT_LENGTH
+    """
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return io.BytesIO()
+
 app = Flask(__name__)
+app.request_class = InMemoryUploadRequest
 CORS(app)
 
+# JSON provider cepat (orjson jika terpasang); JSON_PROVIDER=std untuk stdlib
+app.json = FastJSONProvider(app)
+if os.getenv('JSON_PROVIDER', 'orjson') == 'std':
+    app.json.use_orjson = False
+
 # Konfigurasi
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # Max 16MB
 app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['PRODUCT_BULK_MAX'] = int(os.getenv('PRODUCT_BULK_MAX', 50))
+app.config['TEXT_QUERY_MAX_LENGTH'] = int(os.getenv('TEXT_QUERY_MAX_LENGTH', 500))
+app.config['HISTORY_PAGE_MAX'] = int(os.getenv('HISTORY_PAGE_MAX', 100))
+# X-User-ID dipilih client; riwayat nonaktif kecuali ID bertanda tangan atau proxy tepercaya
+app.config['HISTORY_USER_SECRET'] = os.getenv('HISTORY_USER_SECRET', '')
+app.config['HISTORY_TRUSTED_PROXY'] = os.getenv('HISTORY_TRUSTED_PROXY', 'False') == 'True'
 
 # Pastikan folder upload ada
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # Initialize services
 barcode_service = BarcodeService()
-nutrition_service = HuggingFaceService()  # Menggunakan Hugging Face
+vision_provider = create_groq_provider(models_from_env(
+    'GROQ_MODEL',
+    'meta-llama/llama-4-scout-17b-16e-instruct',
+    'GROQ_FALLBACK_MODELS'
+))
+text_nutrition_service = NutritionService(provider=vision_provider)
+nutrition_service = HuggingFaceService(
+    provider=vision_provider,
+    fallback=FallbackService(
+        text_lookup=text_nutrition_service.get_cached_text_analysis,
+        max_distance=int(os.getenv('FALLBACK_MAX_DISTANCE', 8))
+    )
+)
 image_processor = ImageProcessor()
+history_service = HistoryService(
+    os.getenv('HISTORY_DB_PATH', 'data/history.sqlite3'),
+    utc_offset_minutes=int(os.getenv('HISTORY_UTC_OFFSET_MINUTES', 420))
+)
 
-@app.route('/')
-def home():
+# Response product lookup yang sudah di-serialize: (body, status, etag, expires_at)
+product_response_cache = TTLCache(
+    max_entries=int(os.getenv('PRODUCT_CACHE_SIZE', 4096)),
+    ttl=barcode_service.product_cache_ttl
+)
+
+# Pool konkurensi per kelas endpoint: jalur LLM yang lambat tidak boleh
+# menghabiskan worker untuk endpoint barcode yang murah
+llm_pool = pool_from_env('llm', max_concurrent=4, max_queue=8, max_wait=2)
+barcode_pool = pool_from_env('barcode', max_concurrent=16, max_queue=32, max_wait=1)
+
+# Deadline end-to-end per endpoint (detik), override lewat DEADLINE_<ENDPOINT>.
+# Client bisa memperpendek lewat header X-Request-Timeout.
+ENDPOINT_DEADLINES = {
+    endpoint: float(os.getenv(f"DEADLINE_{endpoint.upper()}", seconds))
+    for endpoint, seconds in {
+        'scan_barcode': 15,
+        'get_product': 12,
+        'get_products': 20,
+        'analyze_food': 45,
+        'analyze_text': 30
+    }.items()
+}
+
+# Traffic capture untuk replay load test (opt-in lewat TRAFFIC_CAPTURE_PATH)
+traffic_recorder = None
+if os.getenv('TRAFFIC_CAPTURE_PATH'):
+    traffic_recorder = TrafficRecorder(
+        os.getenv('TRAFFIC_CAPTURE_PATH'),
+        payload_sample_rate=float(os.getenv('TRAFFIC_CAPTURE_SAMPLE_RATE', 0.01))
+    )
+
+def capture(**fields):
+    """Tambahkan metadata request ke traffic capture (no-op jika nonaktif)"""
+    if traffic_recorder is not None:
+        g.setdefault('capture', {}).update(fields)
+
+def capture_payload(image=None, description=None):
+    """Simpan payload teranonimisasi untuk request yang terpilih sampling"""
+    if not g.get('capture_payload'):
+        return
+    if image is not None:
+        capture(image_b64=traffic_recorder.anonymize_image(image))
+    if description:
+        capture(description=normalize_food_query(description))
+
+@app.before_request
+def assign_request_id():
+    # Pakai X-Request-ID dari client / proxy jika ada
+    set_request_id(request.headers.get('X-Request-ID') or uuid.uuid4().hex)
+    g.request_started_at = time.perf_counter()
+    if traffic_recorder is not None:
+        g.capture_payload = traffic_recorder.should_sample_payload()
+
+@app.before_request
+def start_deadline():
+    deadline = deadline_for_request(
+        request.headers.get('X-Request-Timeout'),
+        ENDPOINT_DEADLINES.get(request.endpoint)
+    )
+    if deadline is not None:
+        g.deadline = deadline
+
+@app.teardown_request
+def cancel_deadline(exc):
+    # Work yang masih tersisa untuk request ini (lookup paralel, hedged
+    # request) ditinggalkan di titik pengecekan berikutnya
+    deadline = g.pop('deadline', None)
+    if deadline is not None:
+        deadline.cancel()
+
+@app.errorhandler(DeadlineExceeded)
+def deadline_exceeded_response(e):
+    """
+    Response 504 untuk request yang melewati deadline-nya
+    """
+    logger.warning("Deadline exceeded", extra={'fields': {'stage': e.stage}})
     return jsonify({
-        'message': 'Food Nutrition Scanner API',
-        'version': '1.0.0',
-        'endpoints': {
-            '/api/scan-barcode': 'POST - Scan barcode dari gambar',
-            '/api/analyze-food': 'POST - Analisis foto makanan dengan AI'
+        'success': False,
+        'error': str(e),
+        'stage': e.stage
+    }), 504
+
+@app.after_request
+def log_request(response):
+    response.headers['X-Request-ID'] = get_request_id()
+    started_at = g.get('request_started_at')
+    duration_ms = round((time.perf_counter() - started_at) * 1000, 2) if started_at else None
+    logger.info("request", extra={'fields': {
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'duration_ms': duration_ms
+    }})
+    
+    if traffic_recorder is not None and request.path.startswith('/api/'):
+        entry = {
+            'ts': time.time(),
+            'method': request.method,
+            'path': request.path,
+            'query': request.query_string.decode('latin-1') if request.method == 'GET' else '',
+            'content_type': request.mimetype,
+            'content_length': request.content_length,
+            'status': response.status_code,
+            'duration_ms': duration_ms
         }
-    })
+        entry.update(g.get('capture', {}))
+        traffic_recorder.record(entry)
+    
+    return response
 
-@app.route('/api/scan-barcode', methods=['POST'])
-def scan_barcode():
+# Profiling memori per request (opt-in): header X-Memory-Profile: 1 atau sampling
+memory_profiler = MemoryProfiler(
+    enabled=os.getenv('MEMORY_PROFILE_ENABLED', 'False') == 'True',
+    sample_rate=float(os.getenv('MEMORY_PROFILE_SAMPLE_RATE', 0)),
+    top_n=int(os.getenv('MEMORY_PROFILE_TOP_N', 10))
+)
+
+@app.before_request
+def start_memory_profile():
+    forced = request.headers.get('X-Memory-Profile') == '1'
+    if request.endpoint != 'memory_profiles' and memory_profiler.should_profile(forced):
+        g.memory_profile = memory_profiler.start(request.endpoint)
+
+@app.after_request
+def finish_memory_profile(response):
+    profile = g.pop('memory_profile', None)
+    if profile is not None:
+        report = memory_profiler.finish(profile)
+        response.headers['X-Memory-Profile-Id'] = report['id']
+        response.headers['X-Memory-Peak-Bytes'] = str(report['peak_bytes'])
+    return response
+
+@app.teardown_request
+def cleanup_memory_profile(exc):
+    # Jalur exception yang tidak melewati after_request
+    profile = g.pop('memory_profile', None)
+    if profile is not None:
+        memory_profiler.finish(profile)
+
+@app.route('/')
+def home():
+    return json_bytes_response(HOME_RESPONSE_BODY)
+
+RAW_IMAGE_MIMETYPES = {'image/jpeg', 'image/png'}
+
+def history_identity_trusted():
     """
-    Endpoint untuk scan barcode dari gambar
+    Riwayat hanya aktif jika X-User-ID tidak bisa dipalsukan client:
+    HISTORY_USER_SECRET diset (ID bertanda tangan) atau HISTORY_TRUSTED_PROXY=True
     """
-    try:
-        # Validasi apakah ada file yang diupload
-        if 'image' not in request.files:
+    return bool(app.config['HISTORY_USER_SECRET'] or app.config['HISTORY_TRUSTED_PROXY'])
+
+def history_identity_required(view):
+    """
+    Tolak endpoint riwayat (403) selama identitas user belum bisa dipercaya
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not history_identity_trusted():
             return jsonify({
                 'success': False,
-                'error': 'Tidak ada file gambar yang diupload'
-            }), 400
+                'error': 'Riwayat membutuhkan HISTORY_USER_SECRET atau HISTORY_TRUSTED_PROXY=True'
+            }), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+def get_user_id():
+    """
+    ID user dari header X-User-ID (riwayat hanya disimpan jika ada).
+    Jika HISTORY_USER_SECRET diset, header harus berupa token dari
+    utils.user_token.sign_user_id; token yang tidak valid diabaikan.
+    
+    Returns:
+        str atau None (selalu None jika history_identity_trusted() False)
+    """
+    if not history_identity_trusted():
+        return None
+    
+    user_id = request.headers.get('X-User-ID', '').strip()
+    if not user_id or len(user_id) > 256:
+        return None
+    
+    secret = app.config['HISTORY_USER_SECRET']
+    if secret:
+        user_id = verify_user_id(user_id, secret)
+        if user_id is None:
+            return None
+    
+    if len(user_id) > 128:
+        return None
+    return user_id
+
+def record_history(source, name, nutrients, payload):
+    """
+    Simpan hasil yang berhasil ke riwayat user; kegagalan penulisan
+    riwayat tidak menggagalkan request
+    
+    Returns:
+        int: ID entry riwayat, atau None jika tidak disimpan
+    """
+    user_id = get_user_id()
+    if user_id is None:
+        return None
+    
+    try:
+        with stage('history_write'):
+            return history_service.record(user_id, source, name, nutrients, payload)
+    except Exception:
+        logger.exception("Gagal menyimpan riwayat")
+        return None
+
+def with_history_id(payload, history_id):
+    if history_id is not None:
+        payload['history_id'] = history_id
+    return payload
+
+def record_text_history(analysis):
+    if 'error' in analysis or 'raw_analysis' in analysis:
+        return None
+    return record_history(
+        'food_text',
+        analysis.get('food_name') or analysis.get('dish_name'),
+        history_service.nutrients_from_analysis(analysis),
+        analysis
+    )
+
+def get_upload_stream():
+    """
+    Ambil stream gambar dari request: body mentah (Content-Type image/jpeg
+    atau image/png) dibaca langsung dari stream WSGI tanpa parsing multipart;
+    selain itu pakai field multipart 'image'.
+    
+    Returns:
+        File-like object, atau None jika tidak ada gambar
+    """
+    if request.mimetype in RAW_IMAGE_MIMETYPES:
+        return request.stream
+    
+    file = request.files.get('image')
+    if file is None:
+        return None
+    return file.stream
+
+def json_bytes_response(body, status=200):
+    """
+    Buat response dari JSON yang sudah di-serialize (tanpa encode ulang)
+    
+    Args:
+        body: JSON dalam bentuk bytes
+        status: HTTP status code
         
-        file = request.files['image']
+    Returns:
+        flask.Response: Response siap kirim
+    """
+    return app.response_class(body, status=status, mimetype=app.json.mimetype)
+
+def cacheable_response(payload, status=200, max_age=0):
+    """
+    Buat JSON response dengan strong ETag dan Cache-Control.
+    
+    Args:
+        payload: Data response
+        status: HTTP status code
+        max_age: Umur cache dalam detik, 0 berarti no-store
         
-        if file.filename == '':
-            return jsonify({
-                'success': False,
-                'error': 'Nama file kosong'
-            }), 400
+    Returns:
+        flask.Response: Response siap kirim
+    """
+    return conditional_bytes_response(app.json.dumps_bytes(payload), status, max_age)
+
+def conditional_bytes_response(body, status, max_age, etag=None):
+    """
+    Response dari JSON bytes dengan strong ETag dan Cache-Control.
+    
+    Request dengan If-None-Match yang cocok dijawab 304 tanpa body.
+    
+    Args:
+        body: JSON dalam bentuk bytes
+        status: HTTP status code
+        max_age: Umur cache dalam detik, 0 berarti no-store
+        etag: ETag yang sudah dihitung (opsional)
         
-        # Validasi format file
-        if not image_processor.allowed_file(file.filename):
+    Returns:
+        flask.Response: Response siap kirim
+    """
+    response = json_bytes_response(body, status)
+    
+    if not max_age:
+        response.cache_control.no_store = True
+        return response
+    
+    response.set_etag(etag or hashlib.sha256(body).hexdigest())
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    
+    return response.make_conditional(request)
+
+# Response konstan di-serialize sekali saat startup
+HOME_RESPONSE_BODY = app.json.dumps_bytes({
+    'message': 'Food Nutrition Scanner API',
+    'version': '1.0.0',
+    'endpoints': {
+        '/api/scan-barcode': 'POST - Scan barcode dari gambar',
+        '/api/analyze-food': 'POST - Analisis foto makanan dengan AI',
+        '/api/analyze-text': 'POST - Estimasi nutrisi dari deskripsi makanan',
+        '/api/product/<barcode>': 'GET - Informasi nutrisi produk dari barcode',
+        '/api/products?barcodes=<b1,b2,...>': 'GET - Informasi nutrisi beberapa produk',
+        '/api/history': 'GET - Riwayat scan/analisis user (header X-User-ID)',
+        '/api/history/summary': 'GET - Total nutrisi harian & mingguan user'
+    }
+})
+
+@app.route('/api/scan-barcode', methods=['POST'])
+@admission_controlled(barcode_pool)
+def scan_barcode():
+    """
+    Endpoint untuk scan barcode dari gambar
+    """
+    try:
+        # Body mentah (image/jpeg, image/png) atau multipart field 'image'
+        stream = get_upload_stream()
+        if stream is None:
             return jsonify({
                 'success': False,
-                'error': 'Format file tidak didukung. Gunakan: jpg, jpeg, png'
+                'error': 'Tidak ada file gambar yang diupload'
             }), 400
         
         # Proses gambar
-        image = image_processor.process_uploaded_file(file)
+        with stage('decode'):
+            image = image_processor.process_stream(stream, g.get('deadline'))
+        capture(image_width=image.width, image_height=image.height)
+        capture_payload(image=image)
         
         # Scan barcode
-        barcode_data = barcode_service.scan_barcode(image)
+        with stage('barcode_scan'):
+            barcode_data = barcode_service.scan_barcode(image, g.get('deadline'))
+        capture(barcode_found=bool(barcode_data), barcode=barcode_data or None)
         
         if not barcode_data:
             return jsonify({
@@ -76,13 +432,42 @@ def scan_barcode():
             }), 404
         
         # Ambil informasi nutrisi dari API
-        nutrition_info = barcode_service.get_nutrition_info(barcode_data)
+        with stage('nutrition_lookup'):
+            nutrition_info = barcode_service.get_nutrition_info(barcode_data, g.get('deadline'))
         
-        return jsonify({
+        history_id = None
+        if 'error' not in nutrition_info:
+            # Nilai Open Food Facts per 100 g, diskalakan ke porsi yang dikonsumsi
+            grams = request.args.get('portion_grams', 100, type=float)
+            if not 0 < grams <= 10000:
+                grams = 100
+            history_id = record_history(
+                'barcode',
+                nutrition_info.get('product_name'),
+                history_service.nutrients_from_product(nutrition_info, grams),
+                dict(nutrition_info, barcode=barcode_data, portion_grams=grams)
+            )
+        
+        return jsonify(with_history_id({
             'success': True,
             'barcode': barcode_data,
             'nutrition': nutrition_info
-        })
+        }, history_id))
+    
+    except DeadlineExceeded as e:
+        return deadline_exceeded_response(e)
+    
+    except UnsupportedImageError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    except (ImageTooLargeError, RequestEntityTooLarge) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 413
     
     except Exception as e:
         return jsonify({
@@ -90,53 +475,168 @@ def scan_barcode():
             'error': str(e)
         }), 500
 
+@app.route('/api/product/<barcode>', methods=['GET'])
+@admission_controlled(barcode_pool)
+def get_product(barcode):
+    """
+    Endpoint untuk lookup nutrisi produk tanpa upload gambar
+    (barcode sudah di-decode di client)
+    """
+    if not barcode_service.is_valid_barcode(barcode):
+        return jsonify({
+            'success': False,
+            'error': 'Barcode tidak valid. Gunakan 8-14 digit angka'
+        }), 400
+    
+    # Cache hit: kirim bytes yang sudah di-serialize beserta ETag-nya
+    cached = product_response_cache.get(barcode)
+    if cached is not None:
+        body, status, etag, expires_at = cached
+        max_age = max(1, int(expires_at - time.monotonic()))
+        return conditional_bytes_response(body, status, max_age, etag)
+    
+    nutrition_info = barcode_service.get_nutrition_info(barcode, g.get('deadline'))
+    max_age = barcode_service.cache_ttl_for(nutrition_info)
+    
+    if 'error' not in nutrition_info:
+        status = 200
+        payload = {
+            'success': True,
+            'barcode': barcode,
+            'nutrition': nutrition_info
+        }
+    else:
+        status = 404 if barcode_service.is_not_found(nutrition_info) else 502
+        payload = {
+            'success': False,
+            'barcode': barcode,
+            'error': nutrition_info['error'],
+            'nutrition': nutrition_info
+        }
+    
+    body = app.json.dumps_bytes(payload)
+    etag = hashlib.sha256(body).hexdigest()
+    if max_age:
+        product_response_cache.set(
+            barcode,
+            (body, status, etag, time.monotonic() + max_age),
+            ttl=max_age
+        )
+    
+    return conditional_bytes_response(body, status, max_age, etag)
+
+@app.route('/api/products', methods=['GET'])
+@admission_controlled(barcode_pool)
+def get_products():
+    """
+    Endpoint untuk lookup nutrisi beberapa produk sekaligus
+    
+    Query: barcodes=8992761001234,8996001600269
+    """
+    barcodes = [b.strip() for b in request.args.get('barcodes', '').split(',') if b.strip()]
+    # Hapus duplikat dengan tetap menjaga urutan
+    barcodes = list(dict.fromkeys(barcodes))
+    
+    if not barcodes:
+        return jsonify({
+            'success': False,
+            'error': 'Parameter barcodes kosong'
+        }), 400
+    
+    if len(barcodes) > app.config['PRODUCT_BULK_MAX']:
+        return jsonify({
+            'success': False,
+            'error': f"Maksimal {app.config['PRODUCT_BULK_MAX']} barcode per request"
+        }), 400
+    
+    invalid = [b for b in barcodes if not barcode_service.is_valid_barcode(b)]
+    if invalid:
+        return jsonify({
+            'success': False,
+            'error': 'Barcode tidak valid. Gunakan 8-14 digit angka',
+            'invalid_barcodes': invalid
+        }), 400
+    
+    products = barcode_service.get_nutrition_info_bulk(barcodes, g.get('deadline'))
+    
+    # Cache selama TTL terpendek; error upstream membuat response no-store
+    max_age = min(barcode_service.cache_ttl_for(info) for info in products.values())
+    
+    return cacheable_response({
+        'success': True,
+        'products': products
+    }, 200, max_age)
+
 @app.route('/api/analyze-food', methods=['POST'])
+@admission_controlled(llm_pool)
 def analyze_food():
     """
     Endpoint untuk analisis foto makanan menggunakan Groq LLM
     """
     try:
-        # Validasi apakah ada file yang diupload
-        if 'image' not in request.files:
+        # Body mentah (image/jpeg, image/png) atau multipart field 'image'
+        stream = get_upload_stream()
+        if stream is None:
             return jsonify({
                 'success': False,
                 'error': 'Tidak ada file gambar yang diupload'
             }), 400
         
-        file = request.files['image']
-        
-        if file.filename == '':
-            return jsonify({
-                'success': False,
-                'error': 'Nama file kosong'
-            }), 400
-        
-        # Validasi format file
-        if not image_processor.allowed_file(file.filename):
-            return jsonify({
-                'success': False,
-                'error': 'Format file tidak didukung. Gunakan: jpg, jpeg, png'
-            }), 400
-        
-        # Ambil deskripsi tambahan jika ada
-        additional_info = request.form.get('description', '')
+        # Ambil deskripsi tambahan jika ada (query string untuk body mentah)
+        additional_info = request.args.get('description', '')
+        if request.mimetype not in RAW_IMAGE_MIMETYPES:
+            additional_info = request.form.get('description', additional_info)
+        capture(description_length=len(additional_info))
+        capture_payload(description=additional_info)
         
         # Proses gambar
-        image = image_processor.process_uploaded_file(file)
+        with stage('decode'):
+            image = image_processor.process_stream(stream, g.get('deadline'))
+        capture(image_width=image.width, image_height=image.height)
+        capture_payload(image=image)
         
         # Convert image ke base64 untuk dikirim ke LLM
-        image_base64 = image_processor.image_to_base64(image)
+        with stage('base64_encode'):
+            image_base64 = image_processor.image_to_base64(image)
         
         # Analisis dengan Groq LLM
-        nutrition_analysis = nutrition_service.analyze_food_image(
-            image_base64, 
-            additional_info
-        )
+        with stage('llm_call'):
+            nutrition_analysis = nutrition_service.analyze_food_image(
+                image_base64, 
+                additional_info,
+                fingerprint=image_processor.perceptual_hash(image),
+                deadline=g.get('deadline')
+            )
         
-        return jsonify({
+        history_id = None
+        # Jawaban degraded hanya perkiraan dari fallback, tidak masuk riwayat
+        if 'error' not in nutrition_analysis and not nutrition_analysis.get('degraded'):
+            history_id = record_history(
+                'food_image',
+                nutrition_analysis.get('dish_name') or nutrition_analysis.get('food_name'),
+                history_service.nutrients_from_analysis(nutrition_analysis),
+                nutrition_analysis
+            )
+        
+        return jsonify(with_history_id({
             'success': True,
             'analysis': nutrition_analysis
-        })
+        }, history_id))
+    
+    except DeadlineExceeded as e:
+        return deadline_exceeded_response(e)
+    
+    except UnsupportedImageError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    except (ImageTooLargeError, RequestEntityTooLarge) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 413
     
     except Exception as e:
         return jsonify({
@@ -144,17 +644,183 @@ def analyze_food():
             'error': str(e)
         }), 500
 
+@app.route('/api/analyze-text', methods=['POST'])
+def analyze_text():
+    """
+    Endpoint untuk estimasi nutrisi dari deskripsi makanan (tanpa gambar)
+    
+    Body: JSON {"description": "nasi goreng telur 1 porsi"} atau form field description
+    """
+    payload = request.get_json(silent=True)
+    if payload is None:
+        payload = {}
+    if not isinstance(payload, dict):
+        return jsonify({
+            'success': False,
+            'error': 'Body JSON harus berupa object'
+        }), 400
+    
+    description = payload.get('description') or request.form.get('description', '')
+    if not isinstance(description, str):
+        return jsonify({
+            'success': False,
+            'error': 'Field description harus berupa string'
+        }), 400
+    description = description.strip()
+    
+    if not description:
+        return jsonify({
+            'success': False,
+            'error': 'Deskripsi makanan kosong'
+        }), 400
+    
+    if len(description) > app.config['TEXT_QUERY_MAX_LENGTH']:
+        return jsonify({
+            'success': False,
+            'error': f"Deskripsi terlalu panjang (maks {app.config['TEXT_QUERY_MAX_LENGTH']} karakter)"
+        }), 400
+    
+    capture(description_length=len(description))
+    capture_payload(description=description)
+    
+    # Cache hit tidak perlu masuk pool LLM
+    analysis = text_nutrition_service.get_cached_text_analysis(description)
+    capture(cached=analysis is not None)
+    if analysis is not None:
+        return jsonify(with_history_id({
+            'success': True,
+            'cached': True,
+            'analysis': analysis
+        }, record_text_history(analysis)))
+    
+    deadline = g.get('deadline')
+    if not llm_pool.acquire(deadline.remaining() if deadline is not None else None):
+        return busy_response(llm_pool)
+    
+    try:
+        with stage('llm_call'):
+            analysis = text_nutrition_service.analyze_food_text(description, deadline)
+    finally:
+        llm_pool.release()
+    
+    return jsonify(with_history_id({
+        'success': True,
+        'cached': False,
+        'analysis': analysis
+    }, record_text_history(analysis)))
+
+@app.route('/api/history', methods=['GET'])
+@history_identity_required
+def history_entries():
+    """
+    Riwayat scan/analisis user, terbaru lebih dulu
+    
+    Header: X-User-ID. Query: limit (default 50), before (unix timestamp, paginasi)
+    """
+    user_id = get_user_id()
+    if user_id is None:
+        return jsonify({
+            'success': False,
+            'error': 'Header X-User-ID wajib diisi'
+        }), 400
+    
+    limit = max(1, min(request.args.get('limit', 50, type=int), app.config['HISTORY_PAGE_MAX']))
+    entries = history_service.entries(
+        user_id,
+        before=request.args.get('before', type=float),
+        limit=limit
+    )
+    
+    return jsonify({
+        'success': True,
+        'entries': entries,
+        'next_before': entries[-1]['created_at'] if len(entries) == limit else None
+    })
+
+@app.route('/api/history/<int:entry_id>', methods=['DELETE'])
+@history_identity_required
+def delete_history_entry(entry_id):
+    """
+    Hapus entry riwayat (rollup harian & mingguan ikut dikurangi)
+    """
+    user_id = get_user_id()
+    if user_id is None:
+        return jsonify({
+            'success': False,
+            'error': 'Header X-User-ID wajib diisi'
+        }), 400
+    
+    if not history_service.delete(user_id, entry_id):
+        return jsonify({
+            'success': False,
+            'error': 'Entry riwayat tidak ditemukan'
+        }), 404
+    
+    return jsonify({'success': True})
+
+@app.route('/api/history/summary', methods=['GET'])
+@history_identity_required
+def history_summary():
+    """
+    Total nutrisi harian dan mingguan dari rollup (tanpa menghitung ulang)
+    
+    Header: X-User-ID. Query: date=YYYY-MM-DD (default hari ini)
+    """
+    user_id = get_user_id()
+    if user_id is None:
+        return jsonify({
+            'success': False,
+            'error': 'Header X-User-ID wajib diisi'
+        }), 400
+    
+    day = None
+    if request.args.get('date'):
+        try:
+            day = date.fromisoformat(request.args['date'])
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Format date harus YYYY-MM-DD'
+            }), 400
+    
+    return jsonify({
+        'success': True,
+        'summary': history_service.summary(user_id, day)
+    })
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """
-    Health check endpoint
+    Health check endpoint, melaporkan saturasi tiap pool endpoint
     """
+    barcode_status = barcode_pool.status()
+    llm_status = llm_pool.status()
+    degraded = barcode_status['state'] != 'operational' or llm_status['state'] != 'operational'
+    
     return jsonify({
-        'status': 'healthy',
+        'status': 'degraded' if degraded else 'healthy',
         'services': {
-            'barcode_scanner': 'operational',
-            'huggingface_llava': 'operational' if os.getenv('HUGGINGFACE_API_KEY') else 'not configured'
-        }
+            'barcode_scanner': barcode_status['state'],
+            'food_analyzer': llm_status['state']
+        },
+        'pools': {
+            'barcode': barcode_status,
+            'llm': llm_status
+        },
+        'vision_backends': vision_provider.status(),
+        'vision_circuit': nutrition_service.circuit.status()
+    })
+
+@app.route('/api/debug/memory', methods=['GET'])
+def memory_profiles():
+    """
+    Laporan profiling memori terbaru (hanya jika MEMORY_PROFILE_ENABLED=True)
+    """
+    if not memory_profiler.enabled:
+        abort(404)
+    
+    return jsonify({
+        'reports': memory_profiler.reports()
     })
 
 if __name__ == '__main__':
@@ -0,0 +1,183 @@
+"""
+Benchmark engine decoder barcode (pyzbar, opencv, race)
+
+Contoh:
+    python benchmark_barcode.py
+    python benchmark_barcode.py --samples 200 --images "test gambar"
+"""
+
+import argparse
+import os
+import random
+import time
+
+import cv2
+import numpy as np
+
+from services.barcode_engines import ENGINES, create_engine
+
+# Pola encoding EAN-13
+EAN_L = ['0001101', '0011001', '0010011', '0111101', '0100011',
+         '0110001', '0101111', '0111011', '0110111', '0001011']
+EAN_R = [''.join('1' if bit == '0' else '0' for bit in code) for code in EAN_L]
+EAN_G = [code[::-1] for code in EAN_R]
+EAN_PARITY = ['LLLLLL', 'LLGLGG', 'LLGGLG', 'LLGGGL', 'LGLLGG',
+              'LGGLLG', 'LGGGLL', 'LGLGLG', 'LGLGGL', 'LGGLGL']
+
+
+def ean13_checksum(digits):
+    """Hitung check digit EAN-13 dari 12 digit pertama"""
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits))
+    return str((10 - total % 10) % 10)
+
+
+def render_ean13(code, module=3, height=120):
+    """
+    Render barcode EAN-13 ke gambar grayscale
+
+    Args:
+        code: 12 digit (check digit ditambahkan otomatis)
+        module: Lebar satu modul dalam piksel
+        height: Tinggi bar dalam piksel
+
+    Returns:
+        tuple: (kode 13 digit, numpy array uint8)
+    """
+    code = code + ean13_checksum(code)
+    parity = EAN_PARITY[int(code[0])]
+
+    bits = '101'
+    for digit, side in zip(code[1:7], parity):
+        bits += (EAN_L if side == 'L' else EAN_G)[int(digit)]
+    bits += '01010'
+    for digit in code[7:]:
+        bits += EAN_R[int(digit)]
+    bits += '101'
+
+    quiet = 11 * module
+    row = np.full(len(bits) * module + 2 * quiet, 255, dtype=np.uint8)
+    for i, bit in enumerate(bits):
+        if bit == '1':
+            row[quiet + i * module:quiet + (i + 1) * module] = 0
+
+    image = np.full((height + 2 * quiet, row.size), 255, dtype=np.uint8)
+    image[quiet:quiet + height] = row
+    return code, image
+
+
+def distort(image, rng):
+    """Tambahkan rotasi, blur dan noise acak"""
+    h, w = image.shape
+    angle = rng.uniform(-12, 12)
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, rng.uniform(0.8, 1.2))
+    image = cv2.warpAffine(image, matrix, (w, h), borderValue=255)
+
+    if rng.random() < 0.5:
+        image = cv2.GaussianBlur(image, (3, 3), 0)
+
+    noise = rng.normal(0, rng.uniform(0, 20), image.shape)
+    image = np.clip(image.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+
+def generate_samples(count, seed):
+    """Buat sampel barcode sintetis beserta ground truth"""
+    rng = np.random.default_rng(seed)
+    py_rng = random.Random(seed)
+    samples = []
+    for _ in range(count):
+        digits = ''.join(py_rng.choice('0123456789') for _ in range(12))
+        code, image = render_ean13(digits, module=py_rng.choice([2, 3, 4]))
+        samples.append((code, distort(image, rng)))
+    return samples
+
+
+def load_images(directory):
+    """Load gambar asli dari folder (tanpa ground truth)"""
+    samples = []
+    for name in sorted(os.listdir(directory)):
+        if name.rsplit('.', 1)[-1].lower() in ('jpg', 'jpeg', 'png'):
+            image = cv2.imread(os.path.join(directory, name))
+            if image is not None:
+                samples.append((None, image))
+    return samples
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def run(engine, samples):
+    """
+    Jalankan satu engine pada semua sampel
+
+    Returns:
+        dict: decode rate, akurasi dan latency (ms)
+    """
+    latencies = []
+    decoded = 0
+    correct = 0
+    labelled = 0
+
+    for expected, image in samples:
+        start = time.perf_counter()
+        try:
+            result = engine.decode(image)
+        except Exception:
+            result = None
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        if result:
+            decoded += 1
+        if expected is not None:
+            labelled += 1
+            if result and result['data'] == expected:
+                correct += 1
+
+    return {
+        'decode_rate': decoded / len(samples) if samples else 0.0,
+        'accuracy': correct / labelled if labelled else None,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+    }
+
+
+def print_report(title, results):
+    print(f"\n=== {title} ===")
+    print(f"{'engine':<10}{'decode':>10}{'akurasi':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, stats in results.items():
+        accuracy = f"{stats['accuracy']:.1%}" if stats['accuracy'] is not None else '-'
+        print(f"{name:<10}{stats['decode_rate']:>10.1%}{accuracy:>10}"
+              f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark engine decoder barcode')
+    parser.add_argument('--samples', type=int, default=100, help='Jumlah gambar sintetis')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--images', help='Folder gambar asli (opsional)')
+    parser.add_argument('--engines', default=','.join(list(ENGINES) + ['race']),
+                        help='Daftar engine, dipisah koma')
+    args = parser.parse_args()
+
+    engines = {}
+    for name in args.engines.split(','):
+        try:
+            engines[name] = create_engine(name)
+        except Exception as e:
+            print(f"Engine {name} dilewati: {str(e)}")
+
+    datasets = [('Sintetis EAN-13', generate_samples(args.samples, args.seed))]
+    if args.images:
+        datasets.append((f"Gambar asli: {args.images}", load_images(args.images)))
+
+    for title, samples in datasets:
+        print_report(title, {name: run(engine, samples) for name, engine in engines.items()})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+"""
+Analisis nutrisi massal untuk folder foto makanan (resumable)
+
+Hasil ditulis per baris ke JSONL segera setelah tiap gambar selesai. Jika
+dijalankan ulang dengan output yang sama, gambar yang sudah berhasil dilewati
+dan gambar identik (hash konten sama) hanya dianalisis sekali.
+
+Contoh:
+    python bulk_analyze.py "foto menu" --output hasil_menu.jsonl
+    python bulk_analyze.py manifest.jsonl --concurrency 8 --rpm 60
+
+Format manifest: satu path per baris, atau JSONL {"path": ..., "description": ...}
+(path relatif terhadap lokasi manifest).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from services.huggingface_service import HuggingFaceService
+from utils.image_processor import ImageProcessor
+from utils.logger import setup_logging
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class RateLimiter:
+    """
+    Batasi laju request ke provider (request per menit) lintas thread
+    """
+
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_at)
+            self._next_at = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ResultWriter:
+    """
+    Tulis hasil ke JSONL secara append; tiap baris di-flush agar aman
+    jika proses dihentikan di tengah jalan
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+        # Tutup baris terakhir yang terpotong dari run sebelumnya
+        if self._file.tell() > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write('\n')
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def load_items(source):
+    """
+    Kumpulkan gambar dari folder (rekursif) atau manifest
+
+    Returns:
+        list: dict {path, description}
+    """
+    if os.path.isdir(source):
+        items = []
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.rsplit('.', 1)[-1].lower() in ImageProcessor.ALLOWED_EXTENSIONS:
+                    items.append({'path': os.path.join(root, name), 'description': ''})
+        return sorted(items, key=lambda item: item['path'])
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    items = []
+    with open(source, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line) if line.startswith('{') else {'path': line}
+            path = entry['path']
+            if not os.path.isabs(path):
+                path = os.path.join(base_dir, path)
+            items.append({'path': path, 'description': entry.get('description', '')})
+    return items
+
+
+def load_completed(output_path):
+    """
+    Baca hasil run sebelumnya
+
+    Returns:
+        tuple: (set path yang sudah berhasil, dict dedupe key -> hasil)
+    """
+    done_paths = set()
+    results = {}
+    if not os.path.exists(output_path):
+        return done_paths, results
+
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Baris terakhir bisa terpotong jika proses dihentikan paksa
+                continue
+            # Hasil tak lengkap dari versi sebelumnya ikut diproses ulang
+            if record.get('status') == 'ok' and is_complete_result(record['result']):
+                done_paths.add(record['path'])
+                results[dedupe_key(record['sha256'], record.get('description', ''))] = record['result']
+    return done_paths, results
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dedupe_key(sha256, description):
+    # Deskripsi ikut mempengaruhi hasil, jadi bagian dari key
+    return f"{sha256}:{description}"
+
+
+def is_complete_result(result):
+    """
+    Hasil dianggap berhasil hanya jika berisi tabel nutrisi yang ter-parse;
+    error, jawaban degraded (circuit open) dan response yang gagal di-parse
+    (raw_analysis) di-retry
+    """
+    return (
+        'error' not in result
+        and not result.get('degraded')
+        and 'raw_analysis' not in result
+        and bool(result.get('nutrition_table'))
+    )
+
+
+def analyze(path, description, image_processor, service, limiter, retries):
+    """
+    Analisis satu gambar, retry dengan backoff jika provider gagal/rate limit
+
+    Returns:
+        tuple: (status, hasil atau pesan error)
+    """
+    try:
+        with open(path, 'rb') as f:
+            image = image_processor.process_stream(f)
+        image_base64 = image_processor.image_to_base64(image)
+    except (OSError, ValueError) as e:
+        return 'error', str(e)
+
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        result = service.analyze_food_image(image_base64, description)
+
+        if is_complete_result(result):
+            return 'ok', result
+
+        if attempt < retries:
+            time.sleep(result.get('retry_after') or min(60, 2 ** attempt))
+
+    if 'error' in result:
+        return 'error', result['error']
+    if result.get('degraded'):
+        return 'error', 'Provider sedang tidak tersedia'
+    return 'error', 'Response model tidak bisa di-parse'
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Analisis nutrisi massal foto makanan')
+    parser.add_argument('source', help='Folder gambar atau file manifest')
+    parser.add_argument('--output', default='bulk_results.jsonl', help='File JSONL hasil')
+    parser.add_argument('--description', default='', help='Deskripsi default untuk semua gambar')
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('BULK_CONCURRENCY', 4)),
+                        help='Maksimal request paralel ke provider')
+    parser.add_argument('--rpm', type=float, default=float(os.getenv('BULK_RPM', 30)),
+                        help='Maksimal request per menit ke provider (0 = tanpa batas)')
+    parser.add_argument('--retries', type=int, default=3, help='Jumlah retry per gambar')
+    args = parser.parse_args()
+
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    setup_logging()
+
+    items = load_items(args.source)
+    for item in items:
+        item['description'] = item['description'] or args.description
+
+    done_paths, known_results = load_completed(args.output)
+    pending = [item for item in items if item['path'] not in done_paths]
+    print(f"{len(items)} gambar, {len(items) - len(pending)} sudah selesai, {len(pending)} diproses")
+
+    writer = ResultWriter(args.output)
+
+    def record(item, sha256, status, payload, **extra):
+        entry = {
+            'path': item['path'],
+            'sha256': sha256,
+            'description': item['description'],
+            'status': status,
+            'analyzed_at': time.time(),
+        }
+        entry['result' if status == 'ok' else 'error'] = payload
+        entry.update(extra)
+        writer.write(entry)
+
+    # Kelompokkan gambar identik: cukup satu panggilan provider per key
+    groups = {}
+    reused = 0
+    for item in pending:
+        try:
+            sha256 = file_sha256(item['path'])
+        except OSError as e:
+            record(item, None, 'error', str(e))
+            continue
+
+        key = dedupe_key(sha256, item['description'])
+        if key in known_results:
+            record(item, sha256, 'ok', known_results[key], deduplicated=True)
+            reused += 1
+        else:
+            groups.setdefault(key, (sha256, []))[1].append(item)
+
+    print(f"{reused} duplikat dari hasil sebelumnya, {len(groups)} gambar unik dikirim ke provider")
+
+    image_processor = ImageProcessor()
+    service = HuggingFaceService()
+    limiter = RateLimiter(args.rpm)
+    counts = {'ok': reused, 'error': 0}
+    started = time.monotonic()
+
+    executor = ThreadPoolExecutor(max_workers=args.concurrency)
+    futures = {
+        executor.submit(analyze, members[0]['path'], members[0]['description'],
+                        image_processor, service, limiter, args.retries): (sha256, members)
+        for sha256, members in groups.values()
+    }
+
+    try:
+        for index, future in enumerate(as_completed(futures), 1):
+            sha256, members = futures[future]
+            status, payload = future.result()
+            for position, item in enumerate(members):
+                record(item, sha256, status, payload, deduplicated=position > 0)
+                counts[status] += 1
+            print(f"[{index}/{len(futures)}] {status:<5} {members[0]['path']}"
+                  + (f" (+{len(members) - 1} duplikat)" if len(members) > 1 else ''))
+    except KeyboardInterrupt:
+        print("Dihentikan; jalankan ulang perintah yang sama untuk melanjutkan")
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        writer.close()
+
+    executor.shutdown()
+    print(f"\nSelesai dalam {time.monotonic() - started:.1f} detik: "
+          f"{counts['ok']} berhasil, {counts['error']} gagal -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
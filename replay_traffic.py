@@ -0,0 +1,361 @@
+"""
+Replay traffic hasil capture (TRAFFIC_CAPTURE_PATH) ke server target
+
+Contoh:
+    # Replay ke server yang sudah berjalan, 2x lebih cepat dari aslinya
+    python replay_traffic.py traces/traffic.jsonl --target http://localhost:5000 --speed 2
+
+    # Jalankan app lokal dengan stand-in Groq & Open Food Facts, secepat mungkin
+    python replay_traffic.py traces/traffic.jsonl --with-stubs --speed 0 --concurrency 32
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+from PIL import Image
+
+from benchmark_barcode import render_ean13
+
+# Barcode pengganti untuk trace lama yang belum menyimpan nilai barcode
+DEFAULT_REPLAY_BARCODE = '899999999999'
+# Margin putih (px) di sekitar barcode sintetis; detektor OpenCV butuh area kosong lebar
+BARCODE_MARGIN = 300
+
+STUB_ANALYSIS = {
+    'dish_name': 'Nasi Goreng',
+    'components': ['Nasi goreng', 'Telur ceplok'],
+    'nutrition_table': [
+        {'component': 'Nasi goreng', 'portion': '1 piring (250 g)', 'calories': '400',
+         'protein': '10', 'fat': '14', 'carbohydrates': '58'},
+        {'component': 'Telur ceplok', 'portion': '1 butir (50 g)', 'calories': '90',
+         'protein': '6', 'fat': '7', 'carbohydrates': '0.5'}
+    ],
+    'total_nutrition': {'total_calories': '490', 'total_protein': '16',
+                        'total_fat': '21', 'total_carbohydrates': '58.5'},
+    'notes': ['Respons stand-in untuk load test']
+}
+
+
+def make_stub_handler(llm_latency, off_latency):
+    """Buat handler HTTP stand-in untuk Groq dan Open Food Facts"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, payload, status=200):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            # Open Food Facts: /api/v2/product/<barcode>
+            match = re.match(r'^/api/v2/product/(\d+)', self.path)
+            if not match:
+                return self._send_json({'error': 'not found'}, 404)
+
+            time.sleep(off_latency)
+            barcode = match.group(1)
+            # Barcode berakhiran 0 dianggap tidak ada di database
+            if barcode.endswith('0'):
+                return self._send_json({'status': 0})
+
+            self._send_json({'status': 1, 'product': {
+                'product_name': f'Produk {barcode}',
+                'brands': 'Stub',
+                'nutriments': {'energy-kcal_100g': 450, 'fat_100g': 20,
+                               'carbohydrates_100g': 60, 'proteins_100g': 7}
+            }})
+
+        def do_POST(self):
+            # Groq (OpenAI-compatible): /openai/v1/chat/completions
+            length = int(self.headers.get('Content-Length') or 0)
+            request_body = json.loads(self.rfile.read(length) or b'{}')
+            time.sleep(llm_latency)
+            self._send_json({
+                'id': 'stub',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': request_body.get('model', 'stub'),
+                'choices': [{
+                    'index': 0,
+                    'finish_reason': 'stop',
+                    'message': {'role': 'assistant', 'content': json.dumps(STUB_ANALYSIS)}
+                }],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+            })
+
+    return StubHandler
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Client (app) menutup koneksi lebih dulu, misal karena deadline habis
+        pass
+
+
+def start_stubs(llm_latency, off_latency):
+    """Jalankan server stand-in di thread background, return base URL"""
+    server = QuietHTTPServer(('127.0.0.1', 0), make_stub_handler(llm_latency, off_latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def start_app(stub_url, port):
+    """Jalankan app.py dengan upstream diarahkan ke stand-in"""
+    env = dict(os.environ)
+    env.update({
+        'PORT': str(port),
+        'DEBUG': 'False',
+        'FOOD_API_URL': f"{stub_url}/api/v2/product",
+        'GROQ_BASE_URL': stub_url,
+        'GROQ_API_KEY': env.get('GROQ_API_KEY') or 'replay-stub',
+        'TRAFFIC_CAPTURE_PATH': '',
+        # Cache text baru setiap run agar hasil replay tidak dipengaruhi run sebelumnya
+        'TEXT_CACHE_PATH': os.path.join(tempfile.mkdtemp(prefix='replay-'), 'text_nutrition.sqlite3'),
+    })
+    process = subprocess.Popen(
+        [sys.executable, 'app.py'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        stdout=subprocess.DEVNULL
+    )
+
+    target = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(f"{target}/api/health", timeout=1)
+            return process, target
+        except requests.exceptions.RequestException:
+            time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError('App tidak bisa dijalankan untuk replay')
+
+
+def load_trace(path, limit=None):
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entries.append(json.loads(line))
+    entries.sort(key=lambda e: e['ts'])
+    return entries[:limit] if limit else entries
+
+
+def synthetic_image(width, height):
+    """Gambar noise berukuran sama untuk entry tanpa payload"""
+    width, height = max(1, width or 640), max(1, height or 480)
+    pixels = np.random.randint(0, 256, (height, width, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def synthetic_barcode_image(barcode, width, height):
+    """
+    Gambar EAN-13 yang bisa didecode, agar replay scan-barcode yang aslinya
+    menemukan barcode juga menjalankan decode dan lookup Open Food Facts
+
+    Args:
+        barcode: Barcode dari trace (EAN-13 / UPC-A dipakai apa adanya)
+        width, height: Ukuran gambar asli
+    """
+    digits = barcode if barcode and barcode.isascii() and barcode.isdigit() else ''
+    if len(digits) == 12:
+        # UPC-A = EAN-13 dengan awalan 0
+        digits = '0' + digits
+    code = digits[:12] if len(digits) == 13 else DEFAULT_REPLAY_BARCODE
+
+    # Geometri yang stabil terbaca OpenCV: modul 3 px dengan margin putih lebar
+    _, bars = render_ean13(code, module=3, height=240)
+    pixels = np.pad(bars, BARCODE_MARGIN, constant_values=255)
+    image = Image.fromarray(pixels)
+
+    # Diskalakan utuh ke ukuran asli agar proporsi barcode terhadap gambar tetap
+    scale = min((width or 0) / image.width, (height or 0) / image.height)
+    if scale > 1:
+        scaled = image.resize((round(image.width * scale), round(image.height * scale)), Image.NEAREST)
+        image = Image.new('L', (width, height), 255)
+        image.paste(scaled, ((width - scaled.width) // 2, (height - scaled.height) // 2))
+
+    buffer = io.BytesIO()
+    image.convert('RGB').save(buffer, format='JPEG', quality=95)
+    return buffer.getvalue()
+
+
+def build_request(entry):
+    """
+    Susun request replay dari entry trace
+
+    Returns:
+        tuple: (method, path, kwargs untuk requests)
+    """
+    path = entry['path']
+    method = entry['method']
+
+    if method == 'GET':
+        query = entry.get('query')
+        return method, f"{path}?{query}" if query else path, {}
+
+    if path in ('/api/scan-barcode', '/api/analyze-food'):
+        if entry.get('image_b64'):
+            body = base64.b64decode(entry['image_b64'])
+        elif entry.get('barcode_found'):
+            body = synthetic_barcode_image(entry.get('barcode'), entry.get('image_width'),
+                                           entry.get('image_height'))
+        else:
+            body = synthetic_image(entry.get('image_width'), entry.get('image_height'))
+        description = entry.get('description')
+        if description is None and entry.get('description_length'):
+            description = ('nasi goreng ' * 50)[:entry['description_length']]
+        params = {'description': description} if description else {}
+        return method, path, {'data': body, 'params': params,
+                              'headers': {'Content-Type': 'image/jpeg'}}
+
+    if path == '/api/analyze-text':
+        description = entry.get('description') or ('nasi goreng ' * 50)[:entry.get('description_length') or 20]
+        return method, path, {'json': {'description': description}}
+
+    return method, path, {}
+
+
+def route_key(path):
+    """Gabungkan path berparameter untuk laporan"""
+    return re.sub(r'^/api/product/[^/]+$', '/api/product/<barcode>', path)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def replay(entries, target, speed, concurrency, timeout):
+    """
+    Kirim ulang semua entry sesuai jadwal aslinya (dibagi speed)
+
+    Latency diukur dari waktu kirim terjadwal, bukan saat thread pool
+    mengambil request, agar waktu antre saat concurrency penuh tetap
+    terhitung (menghindari coordinated omission).
+
+    Returns:
+        dict: route -> list of (latency_ms, status atau None jika exception,
+            keterlambatan kirim dari jadwal dalam ms)
+    """
+    results = defaultdict(list)
+    lock = threading.Lock()
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    def send(entry, scheduled):
+        method, path, kwargs = build_request(entry)
+        lag = (time.perf_counter() - scheduled) * 1000
+        try:
+            status = session.request(method, f"{target}{path}", timeout=timeout, **kwargs).status_code
+        except requests.exceptions.RequestException:
+            status = None
+        latency = (time.perf_counter() - scheduled) * 1000
+        with lock:
+            results[route_key(entry['path'])].append((latency, status, lag))
+
+    first_ts = entries[0]['ts'] if entries else 0
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for entry in entries:
+            if speed > 0:
+                scheduled = started + (entry['ts'] - first_ts) / speed
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                scheduled = time.perf_counter()
+            executor.submit(send, entry, scheduled)
+
+    return results, time.perf_counter() - started
+
+
+def print_report(results, elapsed):
+    print(f"\n{'route':<28}{'count':>7}{'err %':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'lag p99':>10}")
+    total = []
+    for route in sorted(results):
+        samples = results[route]
+        total += samples
+        _print_row(route, samples)
+    if len(results) > 1:
+        _print_row('TOTAL', total)
+    print(f"\n{len(total)} request dalam {elapsed:.1f} detik ({len(total) / max(elapsed, 1e-9):.1f} req/s)")
+
+
+def _print_row(route, samples):
+    latencies = [latency for latency, _, _ in samples]
+    lags = [lag for _, _, lag in samples]
+    errors = sum(1 for _, status, _ in samples if status is None or status >= 500)
+    print(f"{route:<28}{len(samples):>7}{errors / len(samples):>8.1%}"
+          f"{percentile(latencies, 50):>10.1f}{percentile(latencies, 95):>10.1f}"
+          f"{percentile(latencies, 99):>10.1f}{percentile(lags, 99):>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay traffic capture untuk load test')
+    parser.add_argument('trace', help='File JSONL hasil TRAFFIC_CAPTURE_PATH')
+    parser.add_argument('--target', default='http://localhost:5000', help='Base URL server target')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Kelipatan kecepatan (1 = real time, 0 = secepat mungkin)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Maksimal request paralel')
+    parser.add_argument('--limit', type=int, help='Hanya replay N entry pertama')
+    parser.add_argument('--timeout', type=float, default=60, help='Timeout per request (detik)')
+    parser.add_argument('--with-stubs', action='store_true',
+                        help='Jalankan app lokal dengan stand-in Groq & Open Food Facts')
+    parser.add_argument('--port', type=int, default=5055, help='Port app lokal untuk --with-stubs')
+    parser.add_argument('--llm-latency-ms', type=float, default=1500, help='Latency stand-in Groq')
+    parser.add_argument('--off-latency-ms', type=float, default=150, help='Latency stand-in Open Food Facts')
+    args = parser.parse_args()
+
+    entries = load_trace(args.trace, args.limit)
+    if not entries:
+        print('Trace kosong')
+        return
+
+    process = None
+    target = args.target
+    if args.with_stubs:
+        stub_url = start_stubs(args.llm_latency_ms / 1000, args.off_latency_ms / 1000)
+        process, target = start_app(stub_url, args.port)
+        print(f"Stand-in upstream: {stub_url}, app: {target}")
+
+    try:
+        print(f"Replay {len(entries)} request ke {target} (speed {args.speed}x, concurrency {args.concurrency})")
+        results, elapsed = replay(entries, target, args.speed, args.concurrency, args.timeout)
+        print_report(results, elapsed)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
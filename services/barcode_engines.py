@@ -0,0 +1,154 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import logging
+import cv2
+
+logger = logging.getLogger(__name__)
+
+
+class BarcodeEngine:
+    """
+    Interface untuk engine decoder barcode
+    """
+
+    name = 'base'
+
+    def decode(self, image):
+        """
+        Decode barcode dari gambar
+
+        Args:
+            image: numpy array (BGR atau grayscale)
+
+        Returns:
+            dict: {'data': str, 'type': str} atau None jika tidak ditemukan
+        """
+        raise NotImplementedError
+
+
+class PyzbarEngine(BarcodeEngine):
+    """
+    Engine berbasis pyzbar (zbar)
+    """
+
+    name = 'pyzbar'
+
+    def __init__(self):
+        # Import di sini agar deployment OpenCV-only tidak butuh libzbar
+        from pyzbar import pyzbar
+        self._pyzbar = pyzbar
+
+    def decode(self, image):
+        barcodes = self._pyzbar.decode(image)
+
+        if not barcodes:
+            return None
+
+        # Ambil barcode pertama yang ditemukan
+        barcode = barcodes[0]
+        return {
+            'data': barcode.data.decode('utf-8'),
+            'type': barcode.type
+        }
+
+
+class OpenCVEngine(BarcodeEngine):
+    """
+    Engine berbasis cv2.barcode.BarcodeDetector (EAN/UPC)
+    """
+
+    name = 'opencv'
+
+    def __init__(self):
+        self._detector = cv2.barcode.BarcodeDetector()
+
+    def decode(self, image):
+        ok, decoded_info, decoded_type, _ = self._detector.detectAndDecodeWithType(image)
+
+        if not ok:
+            return None
+
+        for data, barcode_type in zip(decoded_info, decoded_type):
+            if data:
+                return {
+                    'data': data,
+                    'type': barcode_type
+                }
+
+        return None
+
+
+class RaceEngine(BarcodeEngine):
+    """
+    Jalankan beberapa engine paralel dan ambil hasil pertama yang berhasil
+    """
+
+    name = 'race'
+
+    def __init__(self, engines):
+        self.engines = engines
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(engines) * 4,
+            thread_name_prefix='barcode-race'
+        )
+
+    def decode(self, image):
+        pending = {self._executor.submit(engine.decode, image) for engine in self.engines}
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception:
+                    continue
+                if result:
+                    # Engine yang kalah dan belum mulai dibatalkan agar tidak
+                    # mengantre di depan scan berikutnya (yang sedang berjalan
+                    # di native code tidak bisa dihentikan)
+                    for other in pending:
+                        other.cancel()
+                    return result
+
+        return None
+
+
+ENGINES = {
+    'pyzbar': PyzbarEngine,
+    'opencv': OpenCVEngine,
+}
+
+
+def create_engine(name):
+    """
+    Buat engine barcode berdasarkan nama konfigurasi
+
+    Args:
+        name: 'pyzbar', 'opencv' atau 'race'
+
+    Returns:
+        BarcodeEngine: Engine yang siap dipakai
+
+    Raises:
+        RuntimeError: Mode race tapi tidak ada engine yang bisa dimuat
+    """
+    name = (name or 'pyzbar').strip().lower()
+
+    if name == 'race':
+        # Race dari engine yang tersedia, misal tanpa libzbar tetap jalan dengan OpenCV
+        engines = []
+        for engine_name, engine_class in ENGINES.items():
+            try:
+                engines.append(engine_class())
+            except Exception as e:
+                logger.warning("Engine %s tidak tersedia untuk race: %s", engine_name, e)
+        if not engines:
+            raise RuntimeError("Tidak ada engine barcode yang bisa dimuat untuk race")
+        return RaceEngine(engines)
+
+    if name not in ENGINES:
+        raise ValueError(
+            f"BARCODE_ENGINE tidak valid: {name} "
+            f"(pilihan: {', '.join(list(ENGINES) + ['race'])})"
+        )
+
+    return ENGINES[name]()
@@ -1,9 +1,18 @@
 import requests
-from pyzbar import pyzbar
 import cv2
 import numpy as np
 from PIL import Image
 import os
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from services.barcode_engines import create_engine
+from utils.cache import TTLCache
+from utils.deadline import DeadlineExceeded, check_deadline, stage_timeout
+
+logger = logging.getLogger(__name__)
+
+BARCODE_PATTERN = re.compile(r'[0-9]{8,14}')
 
 
 class BarcodeService:
@@ -16,17 +25,40 @@ class BarcodeService:
             'FOOD_API_URL', 
             'https://world.openfoodfacts.org/api/v2/product'
         )
+        # Timeout maksimal request ke Open Food Facts (dibatasi lagi oleh deadline request)
+        self.food_api_timeout = float(os.getenv('FOOD_API_TIMEOUT', 10))
+        
+        # Engine decoder: pyzbar, opencv atau race
+        self.engine = create_engine(os.getenv('BARCODE_ENGINE', 'pyzbar'))
+        
+        # Cache hasil lookup Open Food Facts
+        self.product_cache_ttl = int(os.getenv('PRODUCT_CACHE_TTL', 6 * 3600))
+        self.not_found_cache_ttl = int(os.getenv('PRODUCT_NOT_FOUND_CACHE_TTL', 600))
+        self.product_cache = TTLCache(
+            max_entries=int(os.getenv('PRODUCT_CACHE_SIZE', 4096)),
+            ttl=self.product_cache_ttl
+        )
+        self._bulk_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('PRODUCT_BULK_WORKERS', 8)),
+            thread_name_prefix='product-lookup'
+        )
     
-    def scan_barcode(self, image):
+    def scan_barcode(self, image, deadline=None):
         """
         Scan barcode dari gambar
         
         Args:
             image: PIL Image atau numpy array
+            deadline: Deadline request (opsional)
             
         Returns:
             str: Barcode number atau None jika tidak ditemukan
+            
+        Raises:
+            DeadlineExceeded: Deadline sudah habis sebelum decode
         """
+        check_deadline(deadline, 'barcode_scan')
+        
         try:
             # Convert PIL Image ke numpy array jika perlu
             if isinstance(image, Image.Image):
@@ -39,33 +71,127 @@ class BarcodeService:
                 image_bgr = image
             
             # Decode barcode
-            barcodes = pyzbar.decode(image_bgr)
+            barcode = self.engine.decode(image_bgr)
             
-            if barcodes:
-                # Ambil barcode pertama yang ditemukan
-                barcode = barcodes[0]
-                barcode_data = barcode.data.decode('utf-8')
-                barcode_type = barcode.type
+            if barcode:
+                barcode_data = barcode['data']
+                barcode_type = barcode['type']
                 
-                print(f"Barcode ditemukan: {barcode_data} (Type: {barcode_type})")
+                logger.info("Barcode ditemukan", extra={'fields': {
+                    'barcode': barcode_data,
+                    'type': barcode_type,
+                    'engine': self.engine.name
+                }})
                 return barcode_data
             
             return None
             
         except Exception as e:
-            print(f"Error scanning barcode: {str(e)}")
+            logger.exception("Error scanning barcode")
             return None
     
-    def get_nutrition_info(self, barcode):
+    @staticmethod
+    def is_valid_barcode(barcode):
+        """
+        Check apakah string berformat barcode produk (EAN-8 s/d GTIN-14)
+        
+        Args:
+            barcode: Barcode string
+            
+        Returns:
+            bool: True jika valid
+        """
+        # Hanya digit ASCII; str.isdigit() juga menerima digit Unicode lain
+        return BARCODE_PATTERN.fullmatch(barcode) is not None
+    
+    @staticmethod
+    def is_not_found(nutrition_info):
+        """
+        Check apakah hasil lookup adalah produk tidak ditemukan
+        """
+        return nutrition_info.get('error') == 'Produk tidak ditemukan di database'
+    
+    def cache_ttl_for(self, nutrition_info):
+        """
+        TTL cache untuk hasil lookup
+        
+        Args:
+            nutrition_info: Hasil get_nutrition_info
+            
+        Returns:
+            int: TTL dalam detik, 0 jika tidak boleh di-cache (error upstream)
+        """
+        if 'error' not in nutrition_info:
+            return self.product_cache_ttl
+        if self.is_not_found(nutrition_info):
+            return self.not_found_cache_ttl
+        return 0
+    
+    def get_nutrition_info(self, barcode, deadline=None):
+        """
+        Ambil informasi nutrisi produk, dari cache jika tersedia
+        
+        Args:
+            barcode: Barcode number
+            deadline: Deadline request (opsional); membatasi timeout request
+                ke Open Food Facts
+            
+        Returns:
+            dict: Informasi nutrisi produk
+            
+        Raises:
+            DeadlineExceeded: Deadline habis sebelum lookup selesai
+        """
+        nutrition_info = self.product_cache.get(barcode)
+        if nutrition_info is not None:
+            return nutrition_info
+        
+        nutrition_info = self._fetch_nutrition_info(barcode, deadline)
+        
+        ttl = self.cache_ttl_for(nutrition_info)
+        if ttl:
+            self.product_cache.set(barcode, nutrition_info, ttl=ttl)
+        
+        return nutrition_info
+    
+    def get_nutrition_info_bulk(self, barcodes, deadline=None):
+        """
+        Ambil informasi nutrisi untuk beberapa barcode secara paralel
+        
+        Args:
+            barcodes: List barcode (tanpa duplikat)
+            deadline: Deadline request (opsional)
+            
+        Returns:
+            dict: Mapping barcode -> informasi nutrisi
+            
+        Raises:
+            DeadlineExceeded: Deadline habis sebelum semua lookup selesai
+        """
+        results = self._bulk_executor.map(
+            lambda barcode: self.get_nutrition_info(barcode, deadline),
+            barcodes,
+            timeout=stage_timeout(deadline, stage='nutrition_lookup')
+        )
+        try:
+            return dict(zip(barcodes, results))
+        except FuturesTimeoutError:
+            # Lookup yang belum mulai dibatalkan oleh map()
+            raise DeadlineExceeded('nutrition_lookup')
+    
+    def _fetch_nutrition_info(self, barcode, deadline=None):
         """
         Ambil informasi nutrisi dari Open Food Facts API
         
         Args:
             barcode: Barcode number
+            deadline: Deadline request (opsional)
             
         Returns:
             dict: Informasi nutrisi produk
         """
+        timeout = stage_timeout(deadline, self.food_api_timeout, 'nutrition_lookup')
+        
         try:
             # Request ke Open Food Facts API
             url = f"{self.food_api_url}/{barcode}"
@@ -73,7 +199,7 @@ class BarcodeService:
                 'User-Agent': 'FoodNutritionScanner/1.0'
             }
             
-            response = requests.get(url, headers=headers, timeout=10)
+            response = requests.get(url, headers=headers, timeout=timeout)
             
             if response.status_code == 200:
                 data = response.json()
@@ -111,6 +237,8 @@ class BarcodeService:
                 }
                 
         except requests.exceptions.Timeout:
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded('nutrition_lookup')
             return {
                 'error': 'Request timeout',
                 'barcode': barcode
@@ -0,0 +1,70 @@
+from collections import deque
+import threading
+
+
+class FallbackService:
+    """
+    Jawaban degraded berbasis CPU saat provider vision tidak tersedia:
+    1. Hasil analisis text yang sudah di-cache untuk deskripsi user
+    2. Hasil analisis gambar terdekat (perceptual hash, jarak Hamming)
+    """
+
+    def __init__(self, text_lookup=None, max_entries=1000, max_distance=8):
+        """
+        Args:
+            text_lookup: Callable(description) -> dict atau None (opsional)
+            max_entries: Jumlah hasil analisis gambar yang disimpan
+            max_distance: Jarak Hamming maksimal untuk dianggap mirip (dari 64 bit)
+        """
+        self.text_lookup = text_lookup
+        self.max_distance = max_distance
+        self._entries = deque(maxlen=max_entries)  # (fingerprint, result)
+        self._lock = threading.Lock()
+
+    def remember(self, fingerprint, result):
+        """
+        Simpan hasil analisis yang berhasil untuk dipakai sebagai fallback
+
+        Args:
+            fingerprint: Perceptual hash gambar (int 64 bit)
+            result: Hasil analisis
+        """
+        if fingerprint is None or not result.get('nutrition_table'):
+            return
+
+        with self._lock:
+            self._entries.append((fingerprint, result))
+
+    def lookup(self, fingerprint=None, description=''):
+        """
+        Cari jawaban degraded
+
+        Args:
+            fingerprint: Perceptual hash gambar (opsional)
+            description: Deskripsi tambahan dari user (opsional)
+
+        Returns:
+            tuple: (hasil analisis, sumber) atau (None, None)
+        """
+        if description and self.text_lookup:
+            result = self.text_lookup(description)
+            if result is not None:
+                return result, 'text_cache'
+
+        if fingerprint is None:
+            return None, None
+
+        with self._lock:
+            entries = list(self._entries)
+
+        best = None
+        best_distance = self.max_distance + 1
+        for stored, result in entries:
+            distance = bin(stored ^ fingerprint).count('1')
+            if distance < best_distance:
+                best, best_distance = result, distance
+
+        if best is None:
+            return None, None
+
+        return best, 'similar_image'
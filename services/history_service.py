@@ -0,0 +1,292 @@
+from datetime import datetime, timedelta, timezone
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+NUTRIENTS = ('calories', 'protein', 'fat', 'carbohydrates')
+
+NUMBER_PATTERN = re.compile(r'\d+(?:[.,]\d+)?')
+RANGE_PATTERN = re.compile(r'\d\s*(?:-|–|s/d|sampai)\s*\d')
+
+KJ_PER_KCAL = 4.184
+
+
+def parse_amount(value):
+    """
+    Ambil nilai numerik dari string nutrisi
+
+    Contoh: "12 g" -> 12.0, "12,5 g" -> 12.5, "450-500 kcal" -> 475.0,
+    "N/A" -> None
+
+    Args:
+        value: String atau angka dari hasil analisis / Open Food Facts
+
+    Returns:
+        float atau None jika tidak ada angka
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+
+    numbers = [float(n.replace(',', '.')) for n in NUMBER_PATTERN.findall(value)]
+    if not numbers:
+        return None
+
+    # Rentang estimasi diambil nilai tengahnya
+    if len(numbers) >= 2 and RANGE_PATTERN.search(value):
+        return (numbers[0] + numbers[1]) / 2
+
+    return numbers[0]
+
+
+class HistoryService:
+    """
+    Riwayat scan / analisis makanan per user di SQLite, beserta rollup
+    nutrisi harian dan mingguan yang diperbarui setiap kali entry ditulis
+    atau dihapus, sehingga ringkasan cukup dibaca dari satu baris.
+    """
+
+    def __init__(self, path, utc_offset_minutes=420):
+        """
+        Args:
+            path: Lokasi file database SQLite
+            utc_offset_minutes: Zona waktu untuk batas hari/minggu (default WIB)
+        """
+        self.path = path
+        self.timezone = timezone(timedelta(minutes=utc_offset_minutes))
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                day TEXT NOT NULL,
+                week TEXT NOT NULL,
+                source TEXT NOT NULL,
+                name TEXT,
+                calories REAL,
+                protein REAL,
+                fat REAL,
+                carbohydrates REAL,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_history_user_time ON history (user_id, created_at);
+
+            CREATE TABLE IF NOT EXISTS history_rollup (
+                user_id TEXT NOT NULL,
+                period TEXT NOT NULL,
+                period_start TEXT NOT NULL,
+                entries INTEGER NOT NULL,
+                calories REAL NOT NULL,
+                protein REAL NOT NULL,
+                fat REAL NOT NULL,
+                carbohydrates REAL NOT NULL,
+                PRIMARY KEY (user_id, period, period_start)
+            ) WITHOUT ROWID;
+        ''')
+        self._conn.commit()
+
+    @staticmethod
+    def nutrients_from_product(nutrition_info, grams=100):
+        """
+        Nutrisi dari hasil lookup barcode (nilai Open Food Facts per 100 g)
+
+        Args:
+            nutrition_info: Hasil BarcodeService.get_nutrition_info
+            grams: Jumlah yang dikonsumsi dalam gram
+
+        Returns:
+            dict: calories, protein, fat, carbohydrates (None jika tidak ada)
+        """
+        facts = nutrition_info.get('nutrition_facts', {})
+        calories = parse_amount(facts.get('energy_kcal'))
+        if calories is None:
+            energy_kj = parse_amount(facts.get('energy_kj'))
+            calories = energy_kj / KJ_PER_KCAL if energy_kj is not None else None
+
+        values = {
+            'calories': calories,
+            'protein': parse_amount(facts.get('proteins')),
+            'fat': parse_amount(facts.get('fat')),
+            'carbohydrates': parse_amount(facts.get('carbohydrates')),
+        }
+        factor = grams / 100
+        return {key: value * factor if value is not None else None for key, value in values.items()}
+
+    @staticmethod
+    def nutrients_from_analysis(analysis):
+        """
+        Nutrisi dari hasil analisis foto (total_nutrition) atau text
+        (nutrition_per_portion)
+
+        Returns:
+            dict: calories, protein, fat, carbohydrates (None jika tidak ada)
+        """
+        if 'total_nutrition' in analysis:
+            totals = analysis['total_nutrition']
+            return {key: parse_amount(totals.get(f'total_{key}')) for key in NUTRIENTS}
+
+        portion = analysis.get('nutrition_per_portion', {})
+        return {key: parse_amount(portion.get(key)) for key in NUTRIENTS}
+
+    def record(self, user_id, source, name, nutrients, payload, created_at=None):
+        """
+        Simpan satu entry dan perbarui rollup harian & mingguan
+        dalam satu transaksi
+
+        Args:
+            user_id: ID user (dari header X-User-ID)
+            source: barcode, food_image atau food_text
+            name: Nama produk / hidangan
+            nutrients: dict hasil nutrients_from_*
+            payload: Hasil lengkap (disimpan sebagai JSON)
+            created_at: Unix timestamp (default sekarang)
+
+        Returns:
+            int: ID entry, atau None jika tidak ada nilai nutrisi
+        """
+        if all(nutrients.get(key) is None for key in NUTRIENTS):
+            return None
+
+        created_at = created_at or time.time()
+        day, week = self._periods(created_at)
+        values = [nutrients.get(key) for key in NUTRIENTS]
+        serialized = json.dumps(payload, ensure_ascii=False)
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'INSERT INTO history (user_id, created_at, day, week, source, name, '
+                'calories, protein, fat, carbohydrates, payload) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (user_id, created_at, day, week, source, name, *values, serialized)
+            )
+            self._apply_rollup(user_id, day, week, values, 1)
+
+        return cursor.lastrowid
+
+    def delete(self, user_id, entry_id):
+        """
+        Hapus entry milik user dan kurangi rollup-nya
+
+        Returns:
+            bool: True jika entry ditemukan dan dihapus
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT day, week, calories, protein, fat, carbohydrates '
+                'FROM history WHERE id = ? AND user_id = ?',
+                (entry_id, user_id)
+            ).fetchone()
+            if row is None:
+                return False
+
+            day, week, *values = row
+            self._conn.execute('DELETE FROM history WHERE id = ?', (entry_id,))
+            self._apply_rollup(user_id, day, week, values, -1)
+
+        return True
+
+    def summary(self, user_id, date=None):
+        """
+        Total nutrisi hari dan minggu (Senin-Minggu) yang memuat date
+
+        Args:
+            user_id: ID user
+            date: datetime.date (default hari ini)
+
+        Returns:
+            dict: day dan week, masing-masing period_start, entries dan total
+        """
+        if date is None:
+            date = datetime.now(self.timezone).date()
+        day = date.isoformat()
+        week = (date - timedelta(days=date.weekday())).isoformat()
+
+        with self._lock:
+            rows = {
+                period: self._conn.execute(
+                    'SELECT entries, calories, protein, fat, carbohydrates FROM history_rollup '
+                    'WHERE user_id = ? AND period = ? AND period_start = ?',
+                    (user_id, period, start)
+                ).fetchone()
+                for period, start in (('day', day), ('week', week))
+            }
+
+        return {
+            'day': self._format_rollup(day, rows['day']),
+            'week': self._format_rollup(week, rows['week'])
+        }
+
+    def entries(self, user_id, before=None, limit=50):
+        """
+        Entry terbaru milik user (terbaru lebih dulu)
+
+        Args:
+            user_id: ID user
+            before: Unix timestamp; hanya entry sebelum waktu ini (paginasi)
+            limit: Jumlah maksimal entry
+
+        Returns:
+            list: Entry beserta nilai nutrisinya
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, created_at, source, name, calories, protein, fat, carbohydrates '
+                'FROM history WHERE user_id = ? AND created_at < ? '
+                'ORDER BY created_at DESC LIMIT ?',
+                (user_id, before if before is not None else float('inf'), limit)
+            ).fetchall()
+
+        return [
+            {
+                'id': entry_id,
+                'created_at': created_at,
+                'source': source,
+                'name': name,
+                'nutrition': dict(zip(NUTRIENTS, values))
+            }
+            for entry_id, created_at, source, name, *values in rows
+        ]
+
+    def _periods(self, timestamp):
+        date = datetime.fromtimestamp(timestamp, self.timezone).date()
+        week_start = date - timedelta(days=date.weekday())
+        return date.isoformat(), week_start.isoformat()
+
+    def _apply_rollup(self, user_id, day, week, values, sign):
+        deltas = [sign * (value or 0.0) for value in values]
+        for period, start in (('day', day), ('week', week)):
+            self._conn.execute(
+                'INSERT INTO history_rollup (user_id, period, period_start, entries, '
+                'calories, protein, fat, carbohydrates) VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (user_id, period, period_start) DO UPDATE SET '
+                'entries = entries + excluded.entries, '
+                'calories = calories + excluded.calories, '
+                'protein = protein + excluded.protein, '
+                'fat = fat + excluded.fat, '
+                'carbohydrates = carbohydrates + excluded.carbohydrates',
+                (user_id, period, start, sign, *deltas)
+            )
+
+    @staticmethod
+    def _format_rollup(period_start, row):
+        entries, *totals = row if row is not None else (0, 0.0, 0.0, 0.0, 0.0)
+        return {
+            'period_start': period_start,
+            'entries': entries,
+            'total': {key: round(value, 2) for key, value in zip(NUTRIENTS, totals)}
+        }
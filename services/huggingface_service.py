@@ -1,9 +1,16 @@
-from groq import Groq
+from services.llm_provider import create_groq_provider, models_from_env
+from services.fallback_service import FallbackService
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.deadline import DeadlineExceeded
+from utils.logger import log_payload
 from PIL import Image
 import io
 import base64
 import json
 import os
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class HuggingFaceService:
@@ -11,36 +18,61 @@ class HuggingFaceService:
     Service untuk analisis nutrisi makanan menggunakan Groq API
     """
     
-    def __init__(self):
-        self.api_key = os.getenv('GROQ_API_KEY')
-        if not self.api_key:
-            raise ValueError("GROQ_API_KEY tidak ditemukan di environment variables")
+    def __init__(self, provider=None, fallback=None):
+        """
+        Args:
+            provider: LLMProvider (opsional, default dibuat dari GROQ_MODEL
+                dan GROQ_FALLBACK_MODELS)
+            fallback: FallbackService untuk jawaban degraded saat circuit open
+        """
+        if provider is None:
+            provider = create_groq_provider(models_from_env(
+                'GROQ_MODEL',
+                'meta-llama/llama-4-scout-17b-16e-instruct',
+                'GROQ_FALLBACK_MODELS'
+            ))
         
-        self.client = Groq(api_key=self.api_key)
-        self.model = os.getenv('GROQ_MODEL', 'meta-llama/llama-4-scout-17b-16e-instruct')
+        self.provider = provider
+        self.model = provider.model
+        self.fallback = fallback or FallbackService()
+        self.circuit = CircuitBreaker(
+            'vision',
+            failure_threshold=int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5)),
+            latency_threshold=float(os.getenv('CIRCUIT_LATENCY_THRESHOLD', 20)),
+            reset_timeout=float(os.getenv('CIRCUIT_RESET_TIMEOUT', 30)),
+            exclude=(DeadlineExceeded,)
+        )
         
-        print(f"Using Groq API with model: {self.model}")
+        logger.info("Using Groq API with model: %s", self.model)
     
-    def analyze_food_image(self, image_base64, additional_info=""):
+    def analyze_food_image(self, image_base64, additional_info="", fingerprint=None, deadline=None):
         """
-        Analisis foto makanan menggunakan Groq API
+        Analisis foto makanan menggunakan Groq API.
+        
+        Jika provider sedang gagal (circuit open), request langsung dijawab
+        dari FallbackService tanpa memanggil provider.
         
         Args:
             image_base64: Base64 encoded image
             additional_info: Informasi tambahan tentang makanan (opsional)
+            fingerprint: Perceptual hash gambar untuk fallback (opsional)
+            deadline: Deadline request (opsional); membatasi timeout provider
             
         Returns:
             dict: Estimasi informasi nutrisi
+            
+        Raises:
+            DeadlineExceeded: Deadline habis sebelum provider menjawab
         """
         try:
-            print(f"Calling Groq API with model: {self.model}")
+            logger.debug("Calling Groq API with model: %s", self.model)
             
             # Buat prompt untuk analisis nutrisi
             prompt_text = self._create_nutrition_prompt(additional_info)
             
-            # Call Groq API dengan vision
-            completion = self.client.chat.completions.create(
-                model=self.model,
+            # Call Groq API dengan vision (routing ke backend tercepat)
+            response_text, backend = self.circuit.call(
+                self.provider.complete,
                 messages=[
                     {
                         "role": "user",
@@ -58,26 +90,29 @@ class HuggingFaceService:
                         ]
                     }
                 ],
+                deadline=deadline,
                 temperature=0.3,
                 max_tokens=2000,
-                top_p=1,
-                stream=False
+                top_p=1
             )
             
-            # Extract response
-            response_text = completion.choices[0].message.content
-            
-            print(f"Groq response: {response_text[:200]}")
+            log_payload(logger, "Groq response", response_text, backend=backend)
             
             # Parse JSON dari response
             nutrition_data = self._parse_nutrition_response(response_text)
             
+            self.fallback.remember(fingerprint, nutrition_data)
+            
             return nutrition_data
+        
+        except CircuitOpenError as e:
+            return self._degraded_response(fingerprint, additional_info, e.retry_after)
+        
+        except DeadlineExceeded:
+            raise
             
         except Exception as e:
-            print(f"Error in Groq API call: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in Groq API call", extra={'fields': {'model': self.model}})
             
             error_str = str(e)
             
@@ -98,6 +133,33 @@ class HuggingFaceService:
                 'suggestion': 'Coba lagi atau gunakan fitur scan barcode'
             }
     
+    def _degraded_response(self, fingerprint, additional_info, retry_after):
+        """
+        Jawaban cepat tanpa provider saat circuit open
+        
+        Args:
+            fingerprint: Perceptual hash gambar
+            additional_info: Deskripsi tambahan dari user
+            retry_after: Detik sampai provider dicoba lagi
+            
+        Returns:
+            dict: Hasil fallback (ditandai degraded) atau error
+        """
+        result, source = self.fallback.lookup(fingerprint, additional_info)
+        logger.warning("Vision circuit open, degraded response", extra={'fields': {
+            'fallback_source': source
+        }})
+        
+        if result is None:
+            return {
+                'error': 'Layanan analisis foto sedang tidak tersedia',
+                'suggestion': 'Coba lagi dalam beberapa saat atau gunakan fitur scan barcode',
+                'degraded': True,
+                'retry_after': retry_after
+            }
+        
+        return dict(result, degraded=True, degraded_source=source)
+    
     def _create_nutrition_prompt(self, additional_info):
         """
         Buat prompt untuk analisis nutrisi
@@ -220,7 +282,7 @@ PENTING:
                 }
                 
         except json.JSONDecodeError as e:
-            print(f"JSON parse error: {str(e)}")
+            logger.warning("JSON parse error: %s", e)
             return {
                 'dish_name': 'Error parsing',
                 'components': [],
@@ -235,7 +297,7 @@ PENTING:
                 'raw_analysis': response_text
             }
         except Exception as e:
-            print(f"Unexpected error in parsing: {str(e)}")
+            logger.exception("Unexpected error in parsing")
             return {
                 'dish_name': 'Error',
                 'components': [],
@@ -0,0 +1,299 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from groq import Groq
+from utils.deadline import DeadlineExceeded
+import contextvars
+import threading
+import time
+import os
+
+
+class BackendStats:
+    """
+    Statistik rolling latency dan error rate untuk satu backend
+    """
+
+    def __init__(self, window=100, window_seconds=300):
+        self.window_seconds = window_seconds
+        self._samples = deque(maxlen=window)  # (timestamp, latency, ok)
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self._lock:
+            self._samples.append((time.monotonic(), latency, ok))
+
+    def snapshot(self):
+        """
+        Hitung statistik dari sampel dalam jendela waktu
+
+        Returns:
+            dict: samples, error_rate, p50, p95 (detik, None jika belum ada data)
+        """
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            samples = [s for s in self._samples if s[0] >= cutoff]
+
+        latencies = sorted(latency for _, latency, ok in samples if ok)
+        errors = sum(1 for _, _, ok in samples if not ok)
+
+        return {
+            'samples': len(samples),
+            'error_rate': errors / len(samples) if samples else 0.0,
+            'p50': self._percentile(latencies, 50),
+            'p95': self._percentile(latencies, 95),
+        }
+
+    @staticmethod
+    def _percentile(values, pct):
+        if not values:
+            return None
+        index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+        return values[index]
+
+
+class GroqBackend:
+    """
+    Satu kombinasi model + endpoint Groq (OpenAI-compatible)
+    """
+
+    def __init__(self, client, model):
+        self.client = client
+        self.model = model
+        self.name = model
+        self.stats = BackendStats()
+
+    def complete(self, messages, timeout=None, **params):
+        """
+        Kirim chat completion
+
+        Args:
+            messages: List pesan chat
+            timeout: Timeout request dalam detik (opsional)
+            **params: Parameter tambahan (temperature, max_tokens, ...)
+
+        Returns:
+            str: Isi response model
+        """
+        client = self.client
+        if timeout is not None:
+            params['timeout'] = timeout
+            # Retry SDK akan melewati deadline; failover ditangani LLMProvider
+            client = client.with_options(max_retries=0)
+
+        completion = client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=False,
+            **params
+        )
+
+        return completion.choices[0].message.content
+
+
+class LLMProvider:
+    """
+    Provider yang memegang beberapa backend model dan me-routing request
+    ke backend sehat dengan latency terendah.
+
+    Jika hedging aktif, request kedua dikirim ke backend berikutnya saat
+    request pertama melewati p95 backend tersebut; hasil pertama yang
+    berhasil dipakai.
+    """
+
+    def __init__(self, backends, hedge=False, max_error_rate=0.5,
+                 min_samples=5, max_workers=32):
+        if not backends:
+            raise ValueError("LLMProvider membutuhkan minimal satu backend")
+
+        self.backends = backends
+        self.hedge = hedge
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='llm-provider'
+        )
+
+    @property
+    def model(self):
+        """Nama model backend utama (urutan konfigurasi)"""
+        return self.backends[0].model
+
+    def complete(self, messages, timeout=None, deadline=None, **params):
+        """
+        Kirim request ke backend terbaik, dengan failover dan hedging
+
+        Args:
+            messages: List pesan chat
+            timeout: Timeout per request backend dalam detik (opsional)
+            deadline: Deadline request (opsional); tiap request backend hanya
+                mendapat sisa waktunya
+            **params: Parameter tambahan untuk backend
+
+        Returns:
+            tuple: (response text, nama backend yang menjawab)
+
+        Raises:
+            DeadlineExceeded: Deadline habis sebelum ada backend yang menjawab
+            Exception: Error terakhir jika semua backend gagal
+        """
+        ranked = self.rank_backends()
+        pending = {}
+        last_error = None
+
+        primary = ranked.pop(0)
+        pending[self._submit(primary, messages, timeout, deadline, params)] = primary
+
+        while pending:
+            hedge_delay = self._hedge_delay(primary) if ranked and len(pending) == 1 else None
+            wait_timeout = hedge_delay
+            if deadline is not None:
+                remaining = deadline.remaining()
+                wait_timeout = remaining if hedge_delay is None else min(hedge_delay, remaining)
+
+            done, _ = wait(list(pending), timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                if hedge_delay is None or (deadline is not None and deadline.expired()):
+                    # Tinggalkan request yang masih berjalan; yang belum mulai dibatalkan
+                    for future in pending:
+                        future.cancel()
+                    raise DeadlineExceeded('llm_call')
+
+                # Request pertama melewati p95: kirim hedged request
+                backend = ranked.pop(0)
+                pending[self._submit(backend, messages, timeout, deadline, params)] = backend
+                continue
+
+            for future in done:
+                backend = pending.pop(future)
+                try:
+                    return future.result(), backend.name
+                except Exception as e:
+                    last_error = e
+
+            # Failover ke backend berikutnya jika tidak ada yang masih berjalan
+            if not pending and ranked:
+                primary = ranked.pop(0)
+                pending[self._submit(primary, messages, timeout, deadline, params)] = primary
+
+        raise last_error
+
+    def rank_backends(self):
+        """
+        Urutkan backend: yang sehat berdasarkan p50, lalu yang tidak sehat.
+        Backend tanpa data cukup dianggap sehat dan dicoba lebih dulu.
+
+        Returns:
+            list: Backend terurut
+        """
+        healthy = []
+        unhealthy = []
+
+        for index, backend in enumerate(self.backends):
+            stats = backend.stats.snapshot()
+            warmed = stats['samples'] >= self.min_samples
+
+            if warmed and stats['error_rate'] > self.max_error_rate:
+                unhealthy.append((stats['error_rate'], index, backend))
+            else:
+                p50 = stats['p50'] if warmed and stats['p50'] is not None else 0.0
+                healthy.append((p50, index, backend))
+
+        return [b for *_, b in sorted(healthy)] + [b for *_, b in sorted(unhealthy)]
+
+    def status(self):
+        """
+        Statistik semua backend untuk health check
+
+        Returns:
+            dict: Mapping nama backend -> statistik
+        """
+        return {backend.name: backend.stats.snapshot() for backend in self.backends}
+
+    def _hedge_delay(self, backend):
+        if not self.hedge:
+            return None
+
+        stats = backend.stats.snapshot()
+        if stats['samples'] < self.min_samples:
+            return None
+
+        return stats['p95']
+
+    def _submit(self, backend, messages, timeout, deadline, params):
+        if deadline is not None:
+            timeout = deadline.budget(timeout, 'llm_call')
+
+        # Salin context agar request ID (logging) ikut ke thread executor
+        context = contextvars.copy_context()
+        return self._executor.submit(
+            context.run, self._call, backend, messages, timeout, deadline, dict(params)
+        )
+
+    @staticmethod
+    def _call(backend, messages, timeout, deadline, params):
+        # Task bisa tertahan di antrian executor: cek ulang deadline dan
+        # hitung timeout dari sisa waktu saat call benar-benar dimulai
+        if deadline is not None:
+            deadline.check('llm_call')
+            timeout = deadline.budget(timeout, 'llm_call')
+
+        start = time.monotonic()
+        try:
+            result = backend.complete(messages, timeout=timeout, **params)
+        except Exception:
+            # Timeout karena deadline request yang pendek bukan kesalahan backend
+            if deadline is None or not deadline.expired():
+                backend.stats.record(time.monotonic() - start, ok=False)
+            raise
+
+        backend.stats.record(time.monotonic() - start, ok=True)
+        return result
+
+
+def create_groq_provider(models, hedge=None):
+    """
+    Buat LLMProvider dari daftar model Groq
+
+    Args:
+        models: List model; format 'model' atau 'model@base_url'
+        hedge: Aktifkan hedged request (default dari LLM_HEDGE)
+
+    Returns:
+        LLMProvider: Provider siap pakai
+    """
+    api_key = os.getenv('GROQ_API_KEY')
+    if not api_key:
+        raise ValueError("GROQ_API_KEY tidak ditemukan di environment variables")
+
+    if hedge is None:
+        hedge = os.getenv('LLM_HEDGE', 'False') == 'True'
+
+    clients = {}
+    backends = []
+    for spec in models:
+        model, _, base_url = spec.strip().partition('@')
+        base_url = base_url or None
+        if base_url not in clients:
+            clients[base_url] = Groq(api_key=api_key, base_url=base_url)
+        backends.append(GroqBackend(clients[base_url], model))
+
+    return LLMProvider(
+        backends,
+        hedge=hedge,
+        max_error_rate=float(os.getenv('LLM_MAX_ERROR_RATE', 0.5)),
+        max_workers=int(os.getenv('LLM_MAX_WORKERS', 32))
+    )
+
+
+def models_from_env(primary_var, default, fallback_var):
+    """
+    Baca daftar model dari environment: model utama + fallback (dipisah koma)
+
+    Returns:
+        list: Daftar spesifikasi model
+    """
+    models = [os.getenv(primary_var, default)]
+    models += [m.strip() for m in os.getenv(fallback_var, '').split(',') if m.strip()]
+    return models
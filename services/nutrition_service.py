@@ -1,7 +1,13 @@
-from groq import Groq
+from services.llm_provider import create_groq_provider, models_from_env
+from utils.persistent_cache import PersistentCache
+from utils.query_normalizer import normalize_food_query
+from utils.deadline import DeadlineExceeded
 import os
 import json
 import base64
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class NutritionService:
@@ -9,13 +15,39 @@ class NutritionService:
     Service untuk analisis nutrisi makanan menggunakan Groq LLM
     """
     
-    def __init__(self):
-        self.api_key = os.getenv('GROQ_API_KEY')
-        if not self.api_key:
-            raise ValueError("GROQ_API_KEY tidak ditemukan di environment variables")
+    # Naikkan jika prompt/format/normalisasi berubah agar cache lama tidak terpakai
+    TEXT_CACHE_VERSION = 'v2'
+    
+    def __init__(self, provider=None, text_provider=None, text_cache=None):
+        """
+        Args:
+            provider: LLMProvider untuk analisis gambar (opsional)
+            text_provider: LLMProvider untuk analisis text (opsional)
+            text_cache: PersistentCache untuk hasil analisis text (opsional)
+        """
+        if provider is None:
+            provider = create_groq_provider(models_from_env(
+                'GROQ_MODEL',
+                'meta-llama/llama-4-scout-17b-16e-instruct',
+                'GROQ_FALLBACK_MODELS'
+            ))
+        if text_provider is None:
+            text_provider = create_groq_provider(models_from_env(
+                'GROQ_TEXT_MODEL',
+                'llama-3.1-8b-instant',
+                'GROQ_TEXT_FALLBACK_MODELS'
+            ))
+        if text_cache is None:
+            text_cache = PersistentCache(
+                os.getenv('TEXT_CACHE_PATH', 'cache/text_nutrition.sqlite3'),
+                max_entries=int(os.getenv('TEXT_CACHE_SIZE', 10000)),
+                ttl=int(os.getenv('TEXT_CACHE_TTL', 30 * 24 * 3600))
+            )
         
-        self.client = Groq(api_key=self.api_key)
-        self.model = os.getenv('GROQ_MODEL', 'llama-3.2-11b-vision-preview')
+        self.provider = provider
+        self.text_provider = text_provider
+        self.text_cache = text_cache
+        self.model = provider.model
     
     def analyze_food_image(self, image_base64, additional_info=""):
         """
@@ -33,8 +65,7 @@ class NutritionService:
             prompt = self._create_nutrition_prompt(additional_info)
             
             # Call Groq API dengan vision
-            completion = self.client.chat.completions.create(
-                model=self.model,
+            response_text, _ = self.provider.complete(
                 messages=[
                     {
                         "role": "user",
@@ -54,20 +85,16 @@ class NutritionService:
                 ],
                 temperature=0.3,
                 max_tokens=2000,
-                top_p=1,
-                stream=False
+                top_p=1
             )
             
-            # Parse response
-            response_text = completion.choices[0].message.content
-            
             # Parse JSON dari response
             nutrition_data = self._parse_nutrition_response(response_text)
             
             return nutrition_data
             
         except Exception as e:
-            print(f"Error in Groq API call: {str(e)}")
+            logger.exception("Error in Groq API call")
             return {
                 'error': f'Error analyzing image: {str(e)}',
                 'suggestion': 'Pastikan gambar jelas dan API key valid'
@@ -90,7 +117,43 @@ Tugas Anda:
 2. Estimasi porsi/berat makanan (dalam gram atau ml)
 3. Berikan estimasi nilai nutrisi per porsi dan per 100g/100ml
 
-Berikan response dalam format JSON berikut:
+""" + self._response_format()
+        
+        if additional_info:
+            prompt += f"\n\nInformasi tambahan dari user: {additional_info}"
+        
+        return prompt
+    
+    def _create_text_nutrition_prompt(self, food_description):
+        """
+        Buat prompt untuk analisis nutrisi dari deskripsi text
+        
+        Args:
+            food_description: Deskripsi makanan dari user
+            
+        Returns:
+            str: Prompt yang telah diformat
+        """
+        prompt = f"""Berikan estimasi informasi nutrisi dalam bahasa Indonesia untuk makanan berikut.
+
+Deskripsi: {food_description}
+
+Tugas Anda:
+1. Identifikasi jenis makanan/minuman dari deskripsi
+2. Gunakan jumlah/porsi dari deskripsi; jika tidak disebutkan, anggap 1 porsi standar
+3. Berikan estimasi nilai nutrisi per porsi dan per 100g/100ml
+
+"""
+        return prompt + self._response_format()
+    
+    def _response_format(self):
+        """
+        Format JSON response yang diminta dari model
+        
+        Returns:
+            str: Instruksi format response
+        """
+        return """Berikan response dalam format JSON berikut:
 
 {
   "food_name": "Nama makanan/minuman",
@@ -130,13 +193,8 @@ PENTING:
 - Berikan hanya output JSON, tanpa teks tambahan
 - Semua nilai numerik harus dalam string dengan satuan
 - Jika tidak yakin, berikan range nilai dan tulis confidence_level sebagai "rendah"
-- Berikan estimasi yang realistis berdasarkan visual makanan
+- Berikan estimasi yang realistis berdasarkan makanan yang dianalisis
 """
-        
-        if additional_info:
-            prompt += f"\n\nInformasi tambahan dari user: {additional_info}"
-        
-        return prompt
     
     def _parse_nutrition_response(self, response_text):
         """
@@ -166,52 +224,94 @@ PENTING:
                 }
                 
         except json.JSONDecodeError as e:
-            print(f"JSON parse error: {str(e)}")
+            logger.warning("JSON parse error: %s", e)
             return {
                 'raw_analysis': response_text,
                 'error': 'Gagal parse JSON response',
                 'note': 'Data ditampilkan dalam format raw'
             }
     
-    def analyze_food_text(self, food_description):
+    def text_cache_key(self, query):
+        """
+        Cache key untuk query yang sudah dinormalisasi
+        
+        Args:
+            query: Hasil normalize_food_query
+            
+        Returns:
+            str: Cache key
+        """
+        return f"{self.TEXT_CACHE_VERSION}:{self.text_provider.model}:{query}"
+    
+    def get_cached_text_analysis(self, food_description):
         """
-        Analisis deskripsi makanan (text only) untuk mendapatkan estimasi nutrisi
+        Ambil hasil analisis text dari cache tanpa memanggil LLM
         
         Args:
             food_description: Deskripsi makanan dalam text
             
+        Returns:
+            dict: Hasil analisis, atau None jika belum ada di cache
+        """
+        query = normalize_food_query(food_description)
+        if not query:
+            return None
+        return self.text_cache.get(self.text_cache_key(query))
+    
+    def analyze_food_text(self, food_description, deadline=None):
+        """
+        Analisis deskripsi makanan (text only) untuk mendapatkan estimasi nutrisi.
+        
+        Deskripsi dinormalisasi (huruf, spasi, sinonim, jumlah) dan hasilnya
+        disimpan di cache persisten.
+        
+        Args:
+            food_description: Deskripsi makanan dalam text
+            deadline: Deadline request (opsional)
+            
         Returns:
             dict: Estimasi informasi nutrisi
+            
+        Raises:
+            DeadlineExceeded: Deadline habis sebelum provider menjawab
         """
+        query = normalize_food_query(food_description) or food_description.strip()
+        cache_key = self.text_cache_key(query)
+        
+        cached = self.text_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            prompt = f"""Berdasarkan deskripsi makanan berikut, berikan estimasi informasi nutrisi dalam format JSON:
-
-Deskripsi: {food_description}
-
-{self._create_nutrition_prompt("")}
-"""
+            prompt = self._create_text_nutrition_prompt(query)
             
-            completion = self.client.chat.completions.create(
-                model="mixtral-8x7b-32768",  # Model text-only
+            response_text, _ = self.text_provider.complete(
                 messages=[
                     {
                         "role": "user",
                         "content": prompt
                     }
                 ],
+                deadline=deadline,
                 temperature=0.3,
                 max_tokens=2000,
                 top_p=1,
-                stream=False
+                response_format={"type": "json_object"}
             )
             
-            response_text = completion.choices[0].message.content
             nutrition_data = self._parse_nutrition_response(response_text)
             
+            # Hanya hasil yang berhasil di-parse yang di-cache
+            if 'error' not in nutrition_data and 'raw_analysis' not in nutrition_data:
+                self.text_cache.set(cache_key, nutrition_data)
+            
             return nutrition_data
+        
+        except DeadlineExceeded:
+            raise
             
         except Exception as e:
-            print(f"Error in text analysis: {str(e)}")
+            logger.exception("Error in text analysis")
             return {
                 'error': f'Error analyzing text: {str(e)}'
             }
@@ -50,15 +50,169 @@ def test_analyze_food(image_path, description=""):
     except Exception as e:
         print(f"Error: {str(e)}")
 
+def test_get_product(barcode):
+    """Test lookup produk tanpa gambar (termasuk revalidasi ETag)"""
+    print(f"\n=== Testing Product Lookup: {barcode} ===")
+    response = requests.get(f"{BASE_URL}/api/product/{barcode}")
+    print(f"Status: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2, ensure_ascii=False)}")
+    
+    etag = response.headers.get('ETag')
+    if etag:
+        response = requests.get(f"{BASE_URL}/api/product/{barcode}", headers={'If-None-Match': etag})
+        print(f"Status dengan If-None-Match: {response.status_code}")
+
+def test_get_products(barcodes):
+    """Test lookup beberapa produk sekaligus"""
+    print(f"\n=== Testing Bulk Product Lookup: {len(barcodes)} barcode ===")
+    response = requests.get(f"{BASE_URL}/api/products", params={'barcodes': ','.join(barcodes)})
+    print(f"Status: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2, ensure_ascii=False)}")
+
+def test_analyze_text(description, user_id=None):
+    """Test analisis nutrisi dari deskripsi teks"""
+    print(f"\n=== Testing Text Analysis: {description} ===")
+    headers = {'X-User-ID': user_id} if user_id else {}
+    response = requests.post(f"{BASE_URL}/api/analyze-text", json={'description': description}, headers=headers)
+    print(f"Status: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2, ensure_ascii=False)}")
+    return response.json().get('history_id')
+
+def test_history(user_id, limit=10):
+    """Test daftar riwayat user"""
+    print(f"\n=== Testing History: {user_id} ===")
+    response = requests.get(f"{BASE_URL}/api/history", params={'limit': limit}, headers={'X-User-ID': user_id})
+    print(f"Status: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2, ensure_ascii=False)}")
+
+def test_history_summary(user_id, date=None):
+    """Test ringkasan nutrisi harian & mingguan"""
+    print(f"\n=== Testing History Summary: {user_id} ===")
+    params = {'date': date} if date else {}
+    response = requests.get(f"{BASE_URL}/api/history/summary", params=params, headers={'X-User-ID': user_id})
+    print(f"Status: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2, ensure_ascii=False)}")
+
+def test_delete_history(user_id, entry_id):
+    """Test hapus entry riwayat (butuh HISTORY_USER_SECRET / HISTORY_TRUSTED_PROXY)"""
+    print(f"\n=== Testing Delete History: {entry_id} ===")
+    response = requests.delete(f"{BASE_URL}/api/history/{entry_id}", headers={'X-User-ID': user_id})
+    print(f"Status: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2, ensure_ascii=False)}")
+
+def test_normalize_food_query():
+    """Test normalisasi deskripsi makanan (cache key /api/analyze-text)"""
+    from utils.query_normalizer import normalize_food_query
+    
+    print("\n=== Testing Query Normalizer ===")
+    cases = {
+        "Nasgor  TELOR, seporsi": "nasi goreng telur",
+        "nasi goreng dengan telur 1 porsi": "nasi goreng telur",
+        "nasi goreng 2.1 porsi": "nasi goreng 2.1 porsi",
+        "0,1 porsi": "0.1 porsi",
+        "sate 10 tusuk 1 porsi": "sate 10 tusuk",
+    }
+    for text, expected in cases.items():
+        result = normalize_food_query(text)
+        print(f"{text!r} -> {result!r}")
+        assert result == expected, f"expected {expected!r}"
+
+def test_history_rollup():
+    """Test rollup harian & mingguan ikut bertambah / berkurang"""
+    import os
+    import tempfile
+    from datetime import datetime
+    from services.history_service import HistoryService
+    
+    print("\n=== Testing History Rollup ===")
+    with tempfile.TemporaryDirectory() as directory:
+        service = HistoryService(os.path.join(directory, 'history.sqlite3'), utc_offset_minutes=420)
+        monday = datetime(2024, 5, 20, 12, tzinfo=service.timezone).timestamp()
+        tuesday = monday + 24 * 3600
+        
+        soto = service.nutrients_from_analysis({'nutrition_per_portion': {'calories': '280-320 kcal', 'protein': '12,5 g'}})
+        first = service.record('u1', 'food_text', 'Soto', soto, {}, monday)
+        service.record('u1', 'food_text', 'Nasi', {'calories': 200, 'fat': 1.0}, {}, tuesday)
+        service.record('u2', 'food_text', 'Lain', {'calories': 999}, {}, tuesday)
+        assert service.record('u1', 'food_text', 'Kosong', {}, {}, tuesday) is None
+        
+        summary = service.summary('u1', datetime.fromtimestamp(tuesday, service.timezone).date())
+        print(f"Sebelum hapus: {summary}")
+        assert summary['day']['entries'] == 1 and summary['day']['total']['calories'] == 200
+        assert summary['week']['period_start'] == '2024-05-20'
+        assert summary['week']['entries'] == 2 and summary['week']['total']['calories'] == 500
+        assert summary['week']['total']['protein'] == 12.5
+        
+        assert not service.delete('u2', first)
+        assert service.delete('u1', first)
+        summary = service.summary('u1', datetime.fromtimestamp(tuesday, service.timezone).date())
+        print(f"Setelah hapus: {summary}")
+        assert summary['week']['entries'] == 1 and summary['week']['total']['calories'] == 200
+        assert [entry['name'] for entry in service.entries('u1')] == ['Nasi']
+
+def test_circuit_breaker_transitions():
+    """Test transisi circuit: closed -> open -> half_open -> closed / open"""
+    import time
+    from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+    
+    print("\n=== Testing Circuit Breaker ===")
+    
+    def fail():
+        raise RuntimeError('provider error')
+    
+    circuit = CircuitBreaker('test', failure_threshold=2, reset_timeout=0.1)
+    for _ in range(2):
+        try:
+            circuit.call(fail)
+        except RuntimeError:
+            pass
+    print(f"Setelah 2 kegagalan: {circuit.state}")
+    assert circuit.state == CircuitBreaker.OPEN
+    
+    try:
+        circuit.call(lambda: 'ok')
+        assert False, "request seharusnya ditolak saat open"
+    except CircuitOpenError:
+        pass
+    
+    time.sleep(0.15)
+    assert circuit.allow_request() and circuit.state == CircuitBreaker.HALF_OPEN
+    # Hanya satu probe boleh berjalan saat half-open
+    assert not circuit.allow_request()
+    circuit.record_failure()
+    print(f"Probe gagal: {circuit.state}")
+    assert circuit.state == CircuitBreaker.OPEN
+    
+    time.sleep(0.15)
+    assert circuit.call(lambda: 'ok') == 'ok'
+    print(f"Probe berhasil: {circuit.state}")
+    assert circuit.state == CircuitBreaker.CLOSED
+
 if __name__ == "__main__":
     print("=" * 60)
     print("Food Nutrition Scanner API - Test Script")
     print("=" * 60)
     
+    # Test tanpa server
+    test_normalize_food_query()
+    test_history_rollup()
+    test_circuit_breaker_transitions()
+    
     # Test basic endpoints
     test_home()
     test_health_check()
     
+    # Lookup produk tanpa gambar
+    test_get_product("8992761001234")
+    test_get_products(["8992761001234", "8996001600269"])
+    
+    # Analisis teks dan riwayat user
+    history_id = test_analyze_text("Nasi goreng dengan telur", user_id="test-user")
+    test_history("test-user")
+    test_history_summary("test-user")
+    if history_id:
+        test_delete_history("test-user", history_id)
+    
     # Uncomment dan sesuaikan path untuk testing dengan gambar
     # test_scan_barcode("path/to/your/barcode.jpg")
     # test_analyze_food("path/to/your/food.jpg", "Nasi goreng dengan telur")
@@ -0,0 +1,164 @@
+from functools import wraps
+from flask import g, jsonify
+import math
+import os
+import threading
+import time
+
+
+class AdmissionPool:
+    """
+    Pool konkurensi terbatas dengan antrian terbatas untuk satu kelas endpoint.
+
+    Request yang tidak bisa masuk dalam batas antrian / waktu tunggu
+    ditolak (load shedding) agar tidak menumpuk di worker.
+    """
+
+    # Lama status "shedding" dilaporkan setelah penolakan terakhir (detik)
+    SHEDDING_WINDOW = 10
+
+    def __init__(self, name, max_concurrent, max_queue, max_wait):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected_total = 0
+        self._last_rejected_at = None
+        self._cond = threading.Condition()
+
+    @property
+    def retry_after(self):
+        """Nilai header Retry-After (detik)"""
+        return max(1, math.ceil(self.max_wait))
+
+    def acquire(self, max_wait=None):
+        """
+        Ambil slot; menunggu maksimal max_wait detik jika pool penuh
+
+        Args:
+            max_wait: Batas tunggu untuk request ini, misal sisa deadline
+                (opsional, tidak bisa melebihi max_wait pool)
+
+        Returns:
+            bool: True jika diterima, False jika ditolak
+        """
+        with self._cond:
+            if self.in_flight < self.max_concurrent:
+                self.in_flight += 1
+                return True
+
+            if self.queued >= self.max_queue:
+                return self._reject()
+
+            self.queued += 1
+            wait = self.max_wait if max_wait is None else min(self.max_wait, max_wait)
+            deadline = time.monotonic() + wait
+            try:
+                while self.in_flight >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return self._reject()
+                    self._cond.wait(remaining)
+            finally:
+                self.queued -= 1
+
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def status(self):
+        """
+        Status saturasi pool
+
+        Returns:
+            dict: state (operational/saturated/shedding) dan counter
+        """
+        with self._cond:
+            shedding = (
+                self._last_rejected_at is not None
+                and time.monotonic() - self._last_rejected_at < self.SHEDDING_WINDOW
+            )
+            if shedding:
+                state = 'shedding'
+            elif self.in_flight >= self.max_concurrent:
+                state = 'saturated'
+            else:
+                state = 'operational'
+
+            return {
+                'state': state,
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'rejected_total': self.rejected_total
+            }
+
+    def _reject(self):
+        self.rejected_total += 1
+        self._last_rejected_at = time.monotonic()
+        return False
+
+
+def busy_response(pool):
+    """
+    Response 503 dengan Retry-After untuk request yang ditolak pool
+
+    Args:
+        pool: AdmissionPool yang menolak
+    """
+    response = jsonify({
+        'success': False,
+        'error': 'Server sedang sibuk, silakan coba lagi',
+        'retry_after': pool.retry_after
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(pool.retry_after)
+    return response
+
+
+def admission_controlled(pool):
+    """
+    Decorator Flask view: jalankan view di dalam pool, atau balas 503
+    dengan Retry-After jika pool penuh. Waktu tunggu antrian dibatasi
+    sisa deadline request (g.deadline) jika ada.
+
+    Args:
+        pool: AdmissionPool
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            deadline = g.get('deadline')
+            if not pool.acquire(deadline.remaining() if deadline is not None else None):
+                return busy_response(pool)
+
+            try:
+                return view(*args, **kwargs)
+            finally:
+                pool.release()
+
+        return wrapper
+
+    return decorator
+
+
+def pool_from_env(name, max_concurrent, max_queue, max_wait):
+    """
+    Buat AdmissionPool dengan override dari environment
+    (ADMISSION_<NAME>_CONCURRENCY, _QUEUE, _MAX_WAIT)
+    """
+    prefix = f"ADMISSION_{name.upper()}"
+    return AdmissionPool(
+        name,
+        max_concurrent=int(os.getenv(f"{prefix}_CONCURRENCY", max_concurrent)),
+        max_queue=int(os.getenv(f"{prefix}_QUEUE", max_queue)),
+        max_wait=float(os.getenv(f"{prefix}_MAX_WAIT", max_wait))
+    )
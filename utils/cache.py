@@ -0,0 +1,61 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class TTLCache:
+    """
+    Cache in-memory thread-safe dengan batas ukuran (LRU) dan TTL
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Ambil value dari cache
+
+        Args:
+            key: Cache key
+            default: Value jika key tidak ada atau sudah expired
+
+        Returns:
+            Value yang tersimpan atau default
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Simpan value ke cache
+
+        Args:
+            key: Cache key
+            value: Value yang disimpan
+            ttl: TTL khusus dalam detik (default: self.ttl)
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,127 @@
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised jika circuit sedang open dan request tidak dikirim ke provider
+    """
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"Circuit {name} sedang open, coba lagi dalam {retry_after} detik")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker sederhana: closed -> open setelah sejumlah kegagalan
+    berturut-turut (panggilan yang melewati latency_threshold dihitung
+    gagal), lalu half-open setelah reset_timeout untuk satu request probe.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, latency_threshold=None, reset_timeout=30,
+                 exclude=()):
+        """
+        Args:
+            exclude: Tipe exception yang tidak dihitung sebagai kegagalan
+                provider (misal deadline request habis)
+        """
+        self.name = name
+        self.exclude = tuple(exclude)
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def call(self, func, *args, **kwargs):
+        """
+        Jalankan func melalui circuit breaker
+
+        Raises:
+            CircuitOpenError: Circuit open, func tidak dipanggil
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, self.retry_after())
+
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except self.exclude:
+            self._release_probe()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+
+        self.record_success(time.monotonic() - start)
+        return result
+
+    def allow_request(self):
+        """
+        Returns:
+            bool: True jika request boleh dikirim ke provider
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+
+            # Half-open: hanya satu request probe pada satu waktu
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            return False
+
+    def record_success(self, latency):
+        if self.latency_threshold and latency > self.latency_threshold:
+            self.record_failure()
+            return
+
+        with self._lock:
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            probe_failed = self.state == self.HALF_OPEN
+            self._probe_in_flight = False
+
+            if probe_failed or self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def _release_probe(self):
+        with self._lock:
+            self._probe_in_flight = False
+
+    def retry_after(self):
+        """
+        Returns:
+            int: Perkiraan detik sampai circuit menerima probe
+        """
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            return max(1, int(remaining + 0.999))
+
+    def status(self):
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'retry_after': self.retry_after()
+        }
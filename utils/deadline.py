@@ -0,0 +1,120 @@
+import math
+import time
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised jika batas waktu request habis (atau request dibatalkan)
+    sebelum sebuah stage selesai
+    """
+
+    def __init__(self, stage=None):
+        message = "Batas waktu request habis"
+        if stage:
+            message += f" pada stage {stage}"
+        super().__init__(message)
+        self.stage = stage
+
+
+class Deadline:
+    """
+    Batas waktu absolut satu request. Tiap stage hanya mendapat sisa
+    waktunya, dan work untuk request yang sudah expired / dibatalkan
+    dihentikan di titik pengecekan berikutnya.
+    """
+
+    def __init__(self, timeout):
+        """
+        Args:
+            timeout: Total waktu request dalam detik
+        """
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+        self.cancelled = False
+
+    def remaining(self):
+        """
+        Returns:
+            float: Sisa waktu dalam detik (0 jika sudah habis)
+        """
+        if self.cancelled:
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def cancel(self):
+        """Tandai request selesai / ditinggalkan client"""
+        self.cancelled = True
+
+    def check(self, stage=None):
+        """
+        Raises:
+            DeadlineExceeded: Jika deadline sudah habis
+        """
+        if self.expired():
+            raise DeadlineExceeded(stage)
+
+    def budget(self, cap=None, stage=None):
+        """
+        Timeout untuk satu stage: sisa waktu, dibatasi cap
+
+        Args:
+            cap: Timeout maksimal stage dalam detik (opsional)
+            stage: Nama stage untuk pesan error
+
+        Returns:
+            float: Timeout dalam detik
+
+        Raises:
+            DeadlineExceeded: Jika deadline sudah habis
+        """
+        self.check(stage)
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+
+def check_deadline(deadline, stage=None):
+    """Deadline.check yang aman untuk deadline None"""
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def stage_timeout(deadline, cap=None, stage=None):
+    """
+    Deadline.budget yang aman untuk deadline None
+
+    Returns:
+        float: Timeout stage, atau cap jika tidak ada deadline
+    """
+    if deadline is None:
+        return cap
+    return deadline.budget(cap, stage)
+
+
+def deadline_for_request(header_value, configured):
+    """
+    Buat deadline dari header client (detik) dan konfigurasi endpoint.
+    Client hanya bisa memperpendek deadline endpoint, tidak memperpanjang.
+
+    Args:
+        header_value: Nilai header X-Request-Timeout (opsional)
+        configured: Deadline endpoint dalam detik (opsional)
+
+    Returns:
+        Deadline atau None jika tidak ada batas waktu
+    """
+    timeouts = [configured] if configured else []
+
+    if header_value:
+        try:
+            requested = float(header_value)
+        except ValueError:
+            requested = None
+        if requested is not None and math.isfinite(requested) and requested > 0:
+            timeouts.append(requested)
+
+    if not timeouts:
+        return None
+    return Deadline(min(timeouts))
@@ -1,7 +1,24 @@
 from PIL import Image
 import io
+import os
 import base64
 import numpy as np
+import logging
+from utils.deadline import check_deadline
+
+logger = logging.getLogger(__name__)
+
+
+class ImageTooLargeError(ValueError):
+    """
+    Raised jika gambar melebihi batas piksel / memori decode
+    """
+
+
+class UnsupportedImageError(ValueError):
+    """
+    Raised jika magic bytes bukan format gambar yang didukung
+    """
 
 
 class ImageProcessor:
@@ -10,8 +27,40 @@ class ImageProcessor:
     """
     
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+    # MPO: JPEG multi-picture dari kamera ponsel, frame pertama adalah JPEG biasa
+    JPEG_FORMATS = {'JPEG', 'MPO'}
+    ALLOWED_FORMATS = JPEG_FORMATS | {'PNG'}
     MAX_IMAGE_SIZE = (1920, 1920)  # Max width, height
     
+    # Batas dimensi header; di atas ini langsung ditolak tanpa decode
+    MAX_PIXELS = 50_000_000
+    # Batas memori untuk hasil decode (termasuk salinan RGB)
+    MAX_DECODE_BYTES = 64 * 1024 * 1024
+    
+    # Magic bytes untuk deteksi format dari isi file, bukan nama file
+    MAGIC_BYTES = (
+        (b'\xff\xd8\xff', 'JPEG'),
+        (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    )
+    STREAM_CHUNK_SIZE = 64 * 1024
+    # Header (dimensi/mode) dicoba dibaca selama data masih di bawah batas ini
+    HEADER_PROBE_LIMIT = 256 * 1024
+    
+    # Estimasi byte per piksel untuk tiap mode PIL
+    MODE_BYTES_PER_PIXEL = {
+        '1': 1, 'L': 1, 'P': 1, 'LA': 2, 'PA': 2, 'La': 2,
+        'I;16': 2, 'I;16B': 2, 'I;16L': 2, 'I;16N': 2,
+        'RGB': 3, 'YCbCr': 3, 'LAB': 3, 'HSV': 3,
+        'RGBA': 4, 'RGBa': 4, 'RGBX': 4, 'CMYK': 4, 'I': 4, 'F': 4,
+    }
+    
+    def __init__(self):
+        # Dibaca saat instansiasi agar nilai dari .env (load_dotenv) terpakai
+        self.max_pixels = int(os.getenv('IMAGE_MAX_PIXELS', self.MAX_PIXELS))
+        self.max_decode_bytes = int(
+            os.getenv('IMAGE_MAX_DECODE_MB', self.MAX_DECODE_BYTES // (1024 * 1024))
+        ) * 1024 * 1024
+    
     def allowed_file(self, filename):
         """
         Check apakah file extension diperbolehkan
@@ -25,19 +74,63 @@ class ImageProcessor:
         return '.' in filename and \
                filename.rsplit('.', 1)[1].lower() in self.ALLOWED_EXTENSIONS
     
-    def process_uploaded_file(self, file):
+    def sniff_format(self, header):
+        """
+        Deteksi format gambar dari magic bytes
+        
+        Args:
+            header: Beberapa byte pertama file
+            
+        Returns:
+            str: 'JPEG' / 'PNG', atau None jika tidak dikenali
+        """
+        for magic, image_format in self.MAGIC_BYTES:
+            if header.startswith(magic):
+                return image_format
+        return None
+    
+    def process_uploaded_file(self, file, deadline=None):
         """
         Process uploaded file menjadi PIL Image
         
         Args:
             file: Flask uploaded file object
+            deadline: Deadline request (opsional)
+            
+        Returns:
+            PIL.Image: Processed image
+        """
+        return self.process_stream(file.stream, deadline)
+    
+    def process_stream(self, stream, deadline=None):
+        """
+        Process stream gambar (body request mentah atau file) menjadi PIL Image
+        
+        Args:
+            stream: File-like object yang bisa di-read()
+            deadline: Deadline request (opsional); dicek tiap chunk dan
+                sebelum decode
             
         Returns:
             PIL.Image: Processed image
+            
+        Raises:
+            DeadlineExceeded: Deadline habis sebelum gambar selesai diproses
         """
+        # Error dari stream (misal batas ukuran request) diteruskan apa adanya
+        buffer = self.read_image_stream(stream, deadline)
+        check_deadline(deadline, 'decode')
+        
         try:
-            # Read file
-            image = Image.open(file.stream)
+            # Baca header saja (lazy), belum decode piksel
+            image = Image.open(buffer)
+            
+            # Cek format, dimensi dan mode sebelum decode
+            self.check_image_budget(image)
+            
+            # Decode piksel di sini agar data terpotong / rusak langsung
+            # ditolak dan biayanya tercatat di stage decode
+            image.load()
             
             # Convert ke RGB jika perlu
             if image.mode != 'RGB':
@@ -48,9 +141,164 @@ class ImageProcessor:
             
             return image
             
+        except (ImageTooLargeError, UnsupportedImageError):
+            raise
+        except Image.DecompressionBombError as e:
+            raise ImageTooLargeError(str(e))
+        except (Image.UnidentifiedImageError, OSError) as e:
+            # Magic bytes cocok tapi data gambar rusak / tidak bisa di-decode
+            raise UnsupportedImageError(f"File gambar rusak atau tidak bisa dibaca: {str(e)}")
         except Exception as e:
             raise ValueError(f"Error processing image: {str(e)}")
     
+    def read_image_stream(self, stream, deadline=None):
+        """
+        Baca stream per chunk ke memori.
+        
+        Format dicek dari magic bytes chunk pertama, dan header gambar
+        (dimensi/mode) dicek terhadap budget segera setelah tersedia,
+        sehingga upload yang tidak valid atau terlalu besar ditolak
+        sebelum seluruh body dibaca.
+        
+        Args:
+            stream: File-like object yang bisa di-read()
+            deadline: Deadline request (opsional)
+            
+        Stream yang sudah berupa io.BytesIO (upload multipart yang disimpan
+        di memori) dipakai langsung tanpa disalin ke buffer kedua.
+        
+        Returns:
+            io.BytesIO: Buffer berisi seluruh data gambar (posisi 0)
+            
+        Raises:
+            UnsupportedImageError: Bukan JPEG/PNG
+            ImageTooLargeError: Header melebihi budget
+            DeadlineExceeded: Deadline habis saat upload masih dibaca
+        """
+        if isinstance(stream, io.BytesIO):
+            return self._check_memory_stream(stream, deadline)
+        
+        chunk = stream.read(self.STREAM_CHUNK_SIZE)
+        if not chunk:
+            raise UnsupportedImageError("File gambar kosong")
+        if self.sniff_format(chunk) is None:
+            raise UnsupportedImageError("Format file tidak didukung. Gunakan: jpg, jpeg, png")
+        
+        buffer = io.BytesIO()
+        header_checked = False
+        
+        while chunk:
+            buffer.write(chunk)
+            
+            if not header_checked and buffer.tell() <= self.HEADER_PROBE_LIMIT:
+                header_checked = self._probe_header(buffer)
+            
+            check_deadline(deadline, 'upload')
+            chunk = stream.read(self.STREAM_CHUNK_SIZE)
+        
+        buffer.seek(0)
+        return buffer
+    
+    def _check_memory_stream(self, buffer, deadline=None):
+        """
+        Validasi format dan header stream yang sudah ada di memori
+        
+        Returns:
+            io.BytesIO: Buffer yang sama (posisi 0)
+        """
+        buffer.seek(0)
+        header = buffer.read(16)
+        if not header:
+            raise UnsupportedImageError("File gambar kosong")
+        if self.sniff_format(header) is None:
+            raise UnsupportedImageError("Format file tidak didukung. Gunakan: jpg, jpeg, png")
+        
+        check_deadline(deadline, 'upload')
+        self._probe_header(buffer)
+        buffer.seek(0)
+        return buffer
+    
+    def _probe_header(self, buffer):
+        """
+        Coba parse header dari data yang sudah diterima. Buffer dibaca
+        langsung (tanpa salinan), lalu posisinya dikembalikan ke akhir
+        agar chunk berikutnya bisa ditambahkan.
+        
+        Returns:
+            bool: True jika header sudah terbaca dan lolos budget
+        """
+        end = buffer.tell()
+        buffer.seek(0)
+        try:
+            image = Image.open(buffer)
+        except Image.DecompressionBombError as e:
+            raise ImageTooLargeError(str(e))
+        except Exception:
+            # Header belum lengkap, coba lagi setelah chunk berikutnya
+            return False
+        finally:
+            buffer.seek(end)
+        
+        self.check_image_budget(image)
+        return True
+    
+    def check_image_budget(self, image):
+        """
+        Validasi header gambar terhadap batas piksel dan memori decode.
+        
+        Untuk JPEG, decoder diminta decode langsung pada skala kecil
+        (DCT scaling 1/2, 1/4, 1/8) sehingga gambar besar tetap bisa
+        diproses tanpa decode resolusi penuh.
+        
+        Args:
+            image: PIL Image hasil Image.open (belum di-load)
+            
+        Raises:
+            UnsupportedImageError: Format tidak didukung
+            ImageTooLargeError: Gambar melebihi batas
+        """
+        if image.format not in self.ALLOWED_FORMATS:
+            raise UnsupportedImageError(f"Format gambar tidak didukung: {image.format}")
+        
+        width, height = image.size
+        if width * height > self.max_pixels:
+            raise ImageTooLargeError(
+                f"Dimensi gambar terlalu besar: {width}x{height} "
+                f"(maks {self.max_pixels} piksel)"
+            )
+        
+        # Decode JPEG langsung pada skala tereduksi
+        if image.format in self.JPEG_FORMATS:
+            image.draft('RGB', self.MAX_IMAGE_SIZE)
+        
+        decode_bytes = self.estimate_decode_bytes(image)
+        if decode_bytes > self.max_decode_bytes:
+            raise ImageTooLargeError(
+                f"Gambar terlalu besar untuk di-decode: {width}x{height} {image.mode} "
+                f"(~{decode_bytes // (1024 * 1024)} MB, "
+                f"maks {self.max_decode_bytes // (1024 * 1024)} MB)"
+            )
+    
+    def estimate_decode_bytes(self, image):
+        """
+        Estimasi puncak memori untuk decode + konversi ke RGB
+        
+        Args:
+            image: PIL Image (belum di-load)
+            
+        Returns:
+            int: Estimasi jumlah byte
+        """
+        width, height = image.size
+        pixels = width * height
+        decode_bytes = pixels * self.MODE_BYTES_PER_PIXEL.get(image.mode, 4)
+        
+        # convert('RGB') membuat salinan kedua selama konversi
+        if image.mode != 'RGB':
+            decode_bytes += pixels * 3
+        
+        return decode_bytes
+    
     def resize_image(self, image, max_size=None):
         """
         Resize image dengan mempertahankan aspect ratio
@@ -75,8 +323,8 @@ class ImageProcessor:
             ratio = min(max_width / width, max_height / height)
             new_size = (int(width * ratio), int(height * ratio))
             
-            # Resize
-            image = image.resize(new_size, Image.Resampling.LANCZOS)
+            # Resize (reducing_gap: reduce integer dulu, lebih hemat CPU/memori)
+            image = image.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
         
         return image
     
@@ -104,6 +352,28 @@ class ImageProcessor:
         except Exception as e:
             raise ValueError(f"Error converting image to base64: {str(e)}")
     
+    def perceptual_hash(self, image):
+        """
+        Hitung difference hash (dHash) 64 bit untuk mencari gambar mirip
+        
+        Args:
+            image: PIL Image
+            
+        Returns:
+            int: Hash 64 bit
+        """
+        small = image.convert('L').resize((9, 8), Image.Resampling.BILINEAR, reducing_gap=2.0)
+        pixels = list(small.getdata())
+        
+        fingerprint = 0
+        for row in range(8):
+            for col in range(8):
+                left = pixels[row * 9 + col]
+                right = pixels[row * 9 + col + 1]
+                fingerprint = (fingerprint << 1) | (left > right)
+        
+        return fingerprint
+    
     def base64_to_image(self, base64_string):
         """
         Convert base64 string ke PIL Image
@@ -157,5 +427,5 @@ class ImageProcessor:
             return img_array
             
         except Exception as e:
-            print(f"Error enhancing image: {str(e)}")
+            logger.warning("Error enhancing image: %s", e)
             return np.array(image)
@@ -0,0 +1,59 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson opsional
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider Flask yang memakai orjson jika tersedia, dengan fallback
+    ke encoder stdlib. Key tetap diurutkan agar output (dan ETag) stabil.
+    """
+
+    use_orjson = orjson is not None
+
+    def dumps(self, obj, **kwargs):
+        if not self.use_orjson or kwargs.keys() - {'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if not self.use_orjson or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def dumps_bytes(self, obj):
+        """
+        Serialize langsung ke bytes (format compact) tanpa salinan str
+
+        Args:
+            obj: Data yang akan di-serialize
+
+        Returns:
+            bytes: JSON ter-encode UTF-8
+        """
+        if not self.use_orjson:
+            return super().dumps(obj, separators=(',', ':')).encode('utf-8')
+        return self._orjson_dumps(obj)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+
+        if not self.use_orjson:
+            return super().response(obj)
+
+        return self._app.response_class(
+            self._orjson_dumps(obj, indent=indent) + b'\n',
+            mimetype=self.mimetype
+        )
+
+    def _orjson_dumps(self, obj, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
@@ -0,0 +1,138 @@
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import sys
+
+_request_id = contextvars.ContextVar('request_id', default=None)
+
+
+def set_request_id(request_id):
+    """Set request ID untuk context (thread / request) saat ini"""
+    _request_id.set(request_id)
+
+
+def get_request_id():
+    """Request ID context saat ini, atau None di luar request"""
+    return _request_id.get()
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format log record sebagai satu baris JSON
+    """
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        if getattr(record, 'fields', None):
+            entry.update(record.fields)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler yang tidak pernah memblokir thread request.
+
+    Formatting (termasuk traceback) dilakukan di thread listener; jika
+    antrian penuh, record dibuang dan dihitung.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Request ID diambil di thread pemanggil karena berbasis contextvar
+        record.request_id = get_request_id()
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener = None
+_payload_sample_rate = 0.01
+
+
+def setup_logging():
+    """
+    Pasang logging asinkron berbasis antrian pada root logger.
+
+    Konfigurasi dari environment: LOG_LEVEL, LOG_FORMAT (json/text),
+    LOG_QUEUE_SIZE, LOG_PAYLOAD_SAMPLE_RATE.
+
+    Returns:
+        NonBlockingQueueHandler: Handler yang terpasang
+    """
+    global _listener, _payload_sample_rate
+
+    _payload_sample_rate = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', 0.01))
+
+    if _listener is not None:
+        _listener.stop()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if os.getenv('LOG_FORMAT', 'json') == 'json':
+        stream_handler.setFormatter(JSONFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'
+        ))
+
+    log_queue = queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', 10000)))
+    queue_handler = NonBlockingQueueHandler(log_queue)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, NonBlockingQueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    return queue_handler
+
+
+def log_payload(logger, message, payload, max_chars=200, **fields):
+    """
+    Log payload verbose (misal response LLM) secara sampling di level DEBUG.
+
+    Sampling rate dari LOG_PAYLOAD_SAMPLE_RATE (default 0.01); payload
+    dipotong ke max_chars karakter.
+
+    Args:
+        logger: logging.Logger
+        message: Pesan log
+        payload: String payload
+        max_chars: Panjang maksimal payload yang dicatat
+        **fields: Field tambahan untuk log terstruktur
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    if random.random() >= _payload_sample_rate:
+        return
+
+    fields['payload'] = payload[:max_chars]
+    fields['payload_length'] = len(payload)
+    logger.debug(message, extra={'fields': fields})
+
@@ -0,0 +1,186 @@
+from collections import deque
+from contextlib import contextmanager
+import contextvars
+import os
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+
+_current_profile = contextvars.ContextVar('memory_profile', default=None)
+
+
+def _rss_bytes():
+    """
+    Resident set size proses saat ini (Linux), atau None jika tidak tersedia.
+
+    Buffer piksel PIL dialokasikan di luar allocator Python sehingga tidak
+    terlihat oleh tracemalloc; RSS melengkapi angka tersebut.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class RequestProfile:
+    """
+    Hasil profiling memori satu request, per stage
+    """
+
+    def __init__(self, endpoint, top_n):
+        self.id = uuid.uuid4().hex[:12]
+        self.endpoint = endpoint
+        self.top_n = top_n
+        self.started_at = time.time()
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Ukur peak traced memory dan lokasi alokasi terbesar selama stage
+
+        Args:
+            name: Nama stage (misal 'decode', 'base64_encode')
+        """
+        before_snapshot = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        before_current, _ = tracemalloc.get_traced_memory()
+        before_rss = _rss_bytes()
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            current, peak = tracemalloc.get_traced_memory()
+            after_rss = _rss_bytes()
+            after_snapshot = tracemalloc.take_snapshot()
+
+            self.stages.append({
+                'stage': name,
+                'duration_ms': round(duration * 1000, 2),
+                'peak_bytes': peak - before_current,
+                'retained_bytes': current - before_current,
+                'rss_delta_bytes': after_rss - before_rss if before_rss is not None else None,
+                'top_allocations': self._top_allocations(before_snapshot, after_snapshot)
+            })
+
+    def report(self):
+        return {
+            'id': self.id,
+            'endpoint': self.endpoint,
+            'started_at': self.started_at,
+            'peak_bytes': max((s['peak_bytes'] for s in self.stages), default=0),
+            'stages': self.stages
+        }
+
+    def _top_allocations(self, before, after):
+        # Alokasi tracemalloc dan profiler ini sendiri bukan milik request
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)
+        ]
+        diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+        diff = sorted(diff, key=lambda stat: stat.size_diff, reverse=True)[:self.top_n]
+
+        return [
+            {
+                'site': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                'size_diff': stat.size_diff,
+                'count_diff': stat.count_diff
+            }
+            for stat in diff if stat.size_diff > 0
+        ]
+
+
+class MemoryProfiler:
+    """
+    Profiling memori per request (opt-in) berbasis tracemalloc.
+
+    tracemalloc bersifat global untuk proses, sehingga hanya satu request
+    yang diprofile pada satu waktu; alokasi dari thread lain tetap ikut
+    terhitung, jadi gunakan pada traffic rendah atau satu worker khusus.
+    """
+
+    def __init__(self, enabled=False, sample_rate=0.0, top_n=10, history=50, frames=1):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self.frames = frames
+        self._reports = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def should_profile(self, forced=False):
+        """
+        Tentukan apakah request ini diprofile
+
+        Args:
+            forced: True jika client meminta lewat header
+
+        Returns:
+            bool: True jika request perlu diprofile
+        """
+        if not self.enabled:
+            return False
+        return forced or random.random() < self.sample_rate
+
+    def start(self, endpoint):
+        """
+        Mulai profiling request
+
+        Args:
+            endpoint: Nama endpoint
+
+        Returns:
+            RequestProfile: Profile aktif, atau None jika request lain
+                sedang diprofile
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+
+        tracemalloc.start(self.frames)
+        profile = RequestProfile(endpoint, self.top_n)
+        _current_profile.set(profile)
+        return profile
+
+    def finish(self, profile):
+        """
+        Selesaikan profiling dan simpan laporannya
+
+        Args:
+            profile: RequestProfile dari start()
+
+        Returns:
+            dict: Laporan profiling
+        """
+        _current_profile.set(None)
+        tracemalloc.stop()
+        self._lock.release()
+
+        report = profile.report()
+        self._reports.append(report)
+        return report
+
+    def reports(self):
+        """Laporan profiling terbaru (terbaru di akhir)"""
+        return list(self._reports)
+
+
+@contextmanager
+def stage(name):
+    """
+    Ukur stage pada request yang sedang diprofile; no-op jika tidak ada
+
+    Args:
+        name: Nama stage
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    with profile.stage(name):
+        yield
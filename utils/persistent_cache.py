@@ -0,0 +1,98 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class PersistentCache:
+    """
+    Cache key-value JSON berbasis SQLite dengan batas jumlah entry (LRU)
+    dan TTL, tetap tersimpan saat server restart
+    """
+
+    def __init__(self, path, max_entries=10000, ttl=30 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache (accessed_at)')
+        self._conn.commit()
+
+    def get(self, key, default=None):
+        """
+        Ambil value dari cache
+
+        Args:
+            key: Cache key
+            default: Value jika key tidak ada atau sudah expired
+
+        Returns:
+            Value yang tersimpan (hasil json.loads) atau default
+        """
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, created_at FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+
+            if row is None:
+                return default
+
+            value, created_at = row
+            if created_at + self.ttl < now:
+                self._conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+                self._conn.commit()
+                return default
+
+            self._conn.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+
+        return json.loads(value)
+
+    def set(self, key, value):
+        """
+        Simpan value ke cache; entry yang paling lama tidak diakses
+        dibuang jika melebihi max_entries
+
+        Args:
+            key: Cache key
+            value: Value yang bisa di-serialize ke JSON
+        """
+        now = time.time()
+        serialized = json.dumps(value, ensure_ascii=False)
+
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, created_at, accessed_at) '
+                'VALUES (?, ?, ?, ?)',
+                (key, serialized, now, now)
+            )
+            self._conn.execute(
+                'DELETE FROM cache WHERE key IN ('
+                '  SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?'
+                ')',
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
@@ -0,0 +1,108 @@
+import re
+import unicodedata
+
+
+# Ejaan tidak baku / singkatan -> bentuk baku (per kata)
+SYNONYMS = {
+    'telor': 'telur',
+    'nasgor': 'nasi goreng',
+    'mi': 'mie',
+    'indomie': 'mie instan',
+    'baso': 'bakso',
+    'satay': 'sate',
+    'ayem': 'ayam',
+    'tempeh': 'tempe',
+    'sambel': 'sambal',
+    'krupuk': 'kerupuk',
+}
+
+# Kata bilangan -> angka
+NUMBER_WORDS = {
+    'setengah': '0.5',
+    'satu': '1',
+    'dua': '2',
+    'tiga': '3',
+    'empat': '4',
+    'lima': '5',
+    'enam': '6',
+    'tujuh': '7',
+    'delapan': '8',
+    'sembilan': '9',
+    'sepuluh': '10',
+}
+
+# Satuan -> bentuk baku
+UNITS = {
+    'g': 'g', 'gr': 'g', 'grm': 'g', 'gram': 'g',
+    'kg': 'kg',
+    'ml': 'ml', 'l': 'l', 'liter': 'l',
+    'porsi': 'porsi', 'prs': 'porsi',
+    'piring': 'piring', 'mangkuk': 'mangkuk', 'mangkok': 'mangkuk',
+    'gelas': 'gelas', 'butir': 'butir', 'potong': 'potong', 'ptg': 'potong',
+    'buah': 'buah', 'pcs': 'buah', 'bh': 'buah',
+    'sdm': 'sdm', 'sdt': 'sdt', 'bungkus': 'bungkus', 'bks': 'bungkus',
+    'tusuk': 'tusuk', 'lembar': 'lembar', 'centong': 'centong',
+}
+
+# Prefiks "se-" (sepiring, semangkuk) berarti jumlah 1
+SE_PREFIX_UNITS = {'porsi', 'piring', 'mangkuk', 'mangkok', 'gelas', 'butir',
+                   'potong', 'buah', 'bungkus', 'tusuk', 'lembar', 'centong'}
+
+# Kata sambung yang tidak mengubah makna query
+STOPWORDS = {'dengan', 'dan', 'pakai', 'pake', 'plus', 'sama', 'yang', 'ada', 'tambah', 'pakek'}
+
+# Jumlah default yang dianggap sama dengan tanpa jumlah
+DEFAULT_QUANTITY = ('1', 'porsi')
+
+
+def normalize_food_query(text):
+    """
+    Normalisasi deskripsi makanan menjadi cache key yang stabil.
+
+    Contoh: "Nasgor  TELOR, seporsi" dan "nasi goreng dengan telur 1 porsi"
+    sama-sama menjadi "nasi goreng telur".
+
+    Args:
+        text: Deskripsi makanan dari user
+
+    Returns:
+        str: Query yang sudah dinormalisasi
+    """
+    text = unicodedata.normalize('NFKC', text).lower()
+
+    # Desimal koma -> titik, lalu pisahkan angka dari satuan ("200gr" -> "200 gr")
+    text = re.sub(r'(\d),(\d)', r'\1.\2', text)
+    text = re.sub(r'(\d)([a-z])', r'\1 \2', text)
+
+    # Hapus tanda baca
+    text = re.sub(r'[^\w\s.]|(?<!\d)\.|\.(?!\d)', ' ', text)
+
+    tokens = []
+    for token in text.split():
+        if token in STOPWORDS:
+            continue
+        if token.startswith('se') and token[2:] in SE_PREFIX_UNITS:
+            tokens += ['1', UNITS[token[2:]]]
+            continue
+        token = NUMBER_WORDS.get(token, token)
+        token = SYNONYMS.get(token, token)
+        if re.fullmatch(r'\d+\.\d*?0+', token):
+            token = token.rstrip('0').rstrip('.')
+        tokens.append(token)
+
+    # Satuan hanya dibakukan jika didahului angka ("gr" vs kata lain)
+    for i in range(1, len(tokens)):
+        if tokens[i] in UNITS and re.fullmatch(r'\d+(\.\d+)?', tokens[i - 1]):
+            tokens[i] = UNITS[tokens[i]]
+
+    # Hapus jumlah default "1 porsi" (per token agar "2.1 porsi" tidak ikut terpotong)
+    result = []
+    i = 0
+    while i < len(tokens):
+        if tuple(tokens[i:i + 2]) == DEFAULT_QUANTITY:
+            i += 2
+            continue
+        result.append(tokens[i])
+        i += 1
+
+    return ' '.join(result)
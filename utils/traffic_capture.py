@@ -0,0 +1,76 @@
+import base64
+import io
+import json
+import logging
+import os
+import queue
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class TrafficRecorder:
+    """
+    Rekam metadata request ke file JSONL untuk replay load test.
+
+    Penulisan file dilakukan thread background; thread request hanya
+    memasukkan entry ke antrian (dibuang jika antrian penuh). Payload
+    (gambar tanpa metadata EXIF, deskripsi ternormalisasi) hanya disimpan
+    untuk sebagian request sesuai payload_sample_rate.
+    """
+
+    def __init__(self, path, payload_sample_rate=0.01, queue_size=10000):
+        self.path = path
+        self.payload_sample_rate = payload_sample_rate
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._thread = threading.Thread(target=self._writer, name='traffic-capture', daemon=True)
+        self._thread.start()
+
+    def should_sample_payload(self):
+        return random.random() < self.payload_sample_rate
+
+    def record(self, entry):
+        """
+        Masukkan satu entry trace ke antrian tulis
+
+        Args:
+            entry: dict yang bisa di-serialize ke JSON
+        """
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    @staticmethod
+    def anonymize_image(image, quality=85):
+        """
+        Encode ulang gambar tanpa metadata (EXIF, GPS, dll)
+
+        Args:
+            image: PIL Image hasil decode
+
+        Returns:
+            str: JPEG base64
+        """
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=quality)
+        return base64.b64encode(buffer.getvalue()).decode('ascii')
+
+    def _writer(self):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            while True:
+                entry = self._queue.get()
+                try:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                    # Flush saat antrian kosong agar trace tetap terbaca saat berjalan
+                    if self._queue.empty():
+                        f.flush()
+                except Exception:
+                    logger.exception("Gagal menulis traffic capture")
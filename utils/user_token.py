@@ -0,0 +1,36 @@
+import hashlib
+import hmac
+
+
+def sign_user_id(user_id, secret):
+    """
+    Buat token X-User-ID bertanda tangan: "<user_id>.<hmac-sha256 hex>"
+
+    Token diterbitkan oleh backend login / proxy yang memegang secret,
+    sehingga client tidak bisa memilih ID user lain.
+
+    Args:
+        user_id: ID user (boleh mengandung titik; pemisah adalah titik terakhir)
+        secret: HISTORY_USER_SECRET
+
+    Returns:
+        str: Token untuk header X-User-ID
+    """
+    return f"{user_id}.{_signature(user_id, secret)}"
+
+
+def verify_user_id(token, secret):
+    """
+    Verifikasi token dari sign_user_id
+
+    Returns:
+        str: ID user, atau None jika format / tanda tangan tidak valid
+    """
+    user_id, _, signature = token.rpartition('.')
+    if not user_id or not hmac.compare_digest(signature, _signature(user_id, secret)):
+        return None
+    return user_id
+
+
+def _signature(user_id, secret):
+    return hmac.new(secret.encode('utf-8'), user_id.encode('utf-8'), hashlib.sha256).hexdigest()